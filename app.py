@@ -1,25 +1,43 @@
-from dotenv import load_dotenv
-load_dotenv()
-import base64
 import streamlit as st
 import os
-import io
-from PIL import Image
-import pdf2image
-import google.generativeai as genai
+import math
 import time
-import pandas as pd
-import matplotlib.pyplot as plt
+import uuid
 from streamlit_option_menu import option_menu
-import re
-import requests
+from resai import (
+    FEATURE_PROMPTS,
+    REPORT_SECTIONS,
+    JobCancelled,
+    build_report_document,
+    generate_feature_response,
+    get_gemini_client,
+    get_job_runner,
+    get_resume_profile,
+    highlight_keywords,
+    job_key,
+    load_job_descriptions,
+    local_match_score,
+    parse_percentage,
+    process_pdf,
+    profile_summary,
+    rank_job_descriptions,
+    report_partial,
+    run_report,
+    search_jobs,
+)
+from resai.config import RANK_SEPARATOR, RANK_TOP_K, REPORT_MAX_WORKERS
+from resai.pdf import resume_cache_key
+from resai.metrics import add_stages, aggregates, aggregates_jsonl, finish_run, prometheus_text, stage, start_run
+from resai.prompts import (
+    ANALYSIS_PROMPT,
+    INTERVIEW_PREP_PROMPT,
+    MARKET_POSITION_PROMPT,
+    SKILL_DEVELOPMENT_PROMPT,
+    SUGGESTIONS_PROMPT,
+    cover_letter_prompt,
+)
 
-# Load environment variables
-load_dotenv()
-
-# Configure the API
-api_key = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=api_key)
+# The Gemini API key is configured once per process, on the first call (see resai.gemini.get_gemini_client)
 
 # Perplexity API setup
 perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
@@ -28,215 +46,237 @@ perplexity_headers = {
     "Content-Type": "application/json"
 }
 
-# Function to get response from Gemini (using only gemini-1.5-flash)
-def get_gemini_response(input_prompt, pdf_content, job_desc_input):
+# Function to render streamed text into a Streamlit placeholder
+def stream_to(placeholder):
+    return lambda text: placeholder.markdown(f"<div class='highlight'>{text}</div>", unsafe_allow_html=True)
+
+# Function to identify this browser session as a background job owner
+def session_owner():
+    if "job_owner" not in st.session_state:
+        st.session_state.job_owner = uuid.uuid4().hex
+    return st.session_state.job_owner
+
+# Function to start a background job, or attach to the identical one already running in any session
+def start_job(operation, key, fn, *args, **kwargs):
+    return get_job_runner().submit(operation, key, fn, *args, owner=session_owner(), **kwargs)
+
+# Function to build the key of a job that sends the resume to Gemini
+def resume_job_key(operation, pdf_content, resume_text, profile_text, *inputs):
+    # The page images are only hashed when they are what gets sent, i.e. without resume text or a profile
+    return job_key(operation, resume_text, profile_text, *inputs,
+                   None if resume_text or profile_text else [part["data"] for part in pdf_content])
+
+# Function to cancel this session's interest in a job
+def cancel_job(job_id):
+    get_job_runner().cancel(job_id, session_owner())
+
+# Function to wait for a background job, showing its progress and a cancel button
+def wait_for_job(job, label, on_partial=None):
+    """
+    Poll a job until it finishes. The work itself runs off the script thread, so
+    a rerun in the middle only stops the polling; the next run attaches again.
+
+    Args:
+        job: resai.jobs.Job to wait for
+        label (str): Progress bar text
+        on_partial (callable): Called with the job's partial result whenever it changes
+
+    Returns:
+        The job's result
+
+    Raises:
+        JobCancelled: If the job was cancelled
+        RuntimeError: If the job failed
+    """
+    if not job.finished:
+        progress = st.empty()
+        cancel_area = st.empty()
+        cancel_area.button("Cancel", key=f"cancel-{job.id}", on_click=cancel_job, args=(job.id,))
+        shown = None
+        while not job.wait(0.25):
+            progress.progress(job.fraction(), text=f"{label} {job.message}".strip())
+            if on_partial is not None and job.partial is not None and job.partial is not shown:
+                shown = job.partial
+                on_partial(shown)
+        progress.empty()
+        cancel_area.empty()
+    # The job's own stages show up once per session, in the run that saw it finish; ids of jobs the
+    # runner has pruned are dropped, since those jobs can no longer be waited on
+    runner = get_job_runner()
+    merged_jobs = {job_id for job_id in st.session_state.get("merged_jobs", ()) if runner.get(job_id) is not None}
+    if job.id not in merged_jobs:
+        merged_jobs.add(job.id)
+        add_stages(job.stages())
+    st.session_state.merged_jobs = merged_jobs
+    if job.status == "cancelled":
+        raise JobCancelled(f"{label} was cancelled")
+    if job.status == "failed":
+        raise RuntimeError(job.error)
+    return job.result
+
+# Function to get response from Gemini (routed to the "generate" models, see resai.gemini.ModelRouter)
+def get_gemini_response(input_prompt, pdf_content, job_desc_input, use_cache=True, on_text=None, resume_text=None,
+                        profile_text=None):
+    # The job always streams into its partial result; on_text decides whether the page shows it
+    key = resume_job_key("feature", pdf_content, resume_text, profile_text, input_prompt, job_desc_input, use_cache)
+    job = start_job("feature", key, generate_feature_response, input_prompt, pdf_content, job_desc_input, use_cache,
+                    report_partial, resume_text, profile_text)
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content([input_prompt, pdf_content[0], job_desc_input])
-        return response.text
+        with stage(f"feature:{selected}"):
+            return wait_for_job(job, "Generating...", on_text)
+    except JobCancelled:
+        st.warning("Generation cancelled.")
+        return None
     except Exception as e:
         error_msg = str(e)
-        print(f"Error with gemini-1.5-flash: {error_msg}")
+        print(f"Error generating response: {error_msg}")
         st.error(f"Error generating response: {error_msg}")
         return None
 
-# Function to process PDF
-def input_pdf_setup(uploaded_file):
-    if uploaded_file is not None:
-        images = pdf2image.convert_from_bytes(uploaded_file.read())
-        first_page = images[0]
-        img_byte_arr = io.BytesIO()
-        first_page.save(img_byte_arr, format='JPEG')
-        img_byte_arr = img_byte_arr.getvalue()
-        pdf_parts = [
-            {
-                "mime_type": "image/jpeg",
-                "data": base64.b64encode(img_byte_arr).decode()
-            }
-        ]
-        return pdf_parts, images
-    else:
-        raise FileNotFoundError("No file uploaded")
-
-# Function to extract text from resume
-def extract_text_from_pdf(images):
-    text = ""
-    for img in images:
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format='JPEG')
-        img_byte_arr = img_byte_arr.getvalue()
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        image_parts = [
-            {
-                "mime_type": "image/jpeg",
-                "data": base64.b64encode(img_byte_arr).decode()
-            }
-        ]
-        ocr_prompt = "Extract all text from this image, preserve formatting as much as possible."
-        response = model.generate_content([ocr_prompt, image_parts[0]])
-        text += response.text + "\n"
-    return text
-
-# Function to parse the percentage match from the response
-def parse_percentage(response_text):
-    match = re.search(r'(\d+)%', response_text)
-    if match:
-        return int(match.group(1))
-    return 0
-
-# Function to generate suggestions for improvement
-def generate_suggestions(pdf_content, job_desc):
-    prompt = """
-    You are a professional career coach with expertise in resume optimization.
-    Based on the resume and job description provided, offer 5 specific, actionable suggestions to improve the resume.
-    Format your response as a bulleted list. Be concise but specific.
-    Focus on content, structure, keywords, and presentation improvements.
+# Function to process an uploaded resume, reusing cached pages and text when available
+def process_resume(uploaded_file):
     """
-    return get_gemini_response(prompt, pdf_content, job_desc)
+    Rasterize and extract text from an uploaded resume, or load both from the on-disk cache.
 
-# Function to highlight keywords in the resume text
-def highlight_keywords(resume_text, job_desc):
-    prompt = f"""
-    Extract the top 15 most important keywords from this job description, and return them as a comma-separated list:
-    
-    {job_desc}
+    Processing runs as a background job shared by every session uploading the
+    same file. The session keeps its job across reruns, so a finished (or
+    cancelled) result is reused until another file is uploaded; failed jobs
+    are retried on the next run.
+
+    Args:
+        uploaded_file: Streamlit UploadedFile with the resume PDF
+
+    Returns:
+        tuple: (pdf_parts, resume_text, page_sources), see resai.pdf.process_pdf
     """
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content(prompt)
-    keywords = [kw.strip() for kw in response.text.split(',')]
-    
-    highlighted_text = resume_text
-    for keyword in keywords:
-        pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-        highlighted_text = pattern.sub(f"**{keyword}**", highlighted_text)
-    
-    return highlighted_text, keywords
+    pdf_bytes = uploaded_file.getvalue()
+    key = job_key("process_pdf", pdf_bytes)
+    job = get_job_runner().get(st.session_state.get("resume_job"))
+    if job is None or job.key != key or job.status == "failed":
+        job = start_job("process_pdf", key, process_pdf, pdf_bytes)
+        st.session_state.resume_job = job.id
+    with stage("process_resume", bytes=uploaded_file.size):
+        return wait_for_job(job, "Processing your resume...")
 
+# Function to start extracting the processed resume's profile in the background, once per resume
+def start_resume_profile(pdf_bytes, pdf_content, resume_text=None, use_cache=True):
+    """
+    Submit the profile job (see resai.profile) without waiting for it, so the
+    page renders at once; features wait for it through current_profile. The
+    outcome, including a failure, is kept in the session per resume hash and
+    use_cache, so "Fresh generation" extracts the profile again once.
+    """
+    key = (resume_cache_key(pdf_bytes), use_cache)
+    stored = st.session_state.get("resume_profile")
+    if stored is None or stored["key"] != key:
+        stored = {"key": key, "args": (key[0], resume_text, pdf_content, use_cache), "job_id": None,
+                  "profile": None, "failed": False}
+        st.session_state.resume_profile = stored
+    if stored["profile"] is None and not stored["failed"] and get_job_runner().get(stored["job_id"]) is None:
+        # Not started yet, cancelled, or the finished job has expired (the profile itself is then read from disk)
+        stored["job_id"] = start_job("profile", job_key("profile", *key), get_resume_profile, *stored["args"]).id
 
-# Function to search using Perplexity API with improved robustness and flexibility
-def tavily_job_search(resume_text, job_desc_input, count=5):
+# Function to get the resume's profile, waiting for its extraction if wait is set
+def current_profile(wait=True):
     """
-    Perform a job search using Tavily Search API
-    
-    Args:
-        resume_text (str): Extracted text from the user's resume
-        job_desc_input (str): Job description or target role
-        count (int): Number of search results to retrieve
-    
-    Returns:
-        str: Markdown-formatted job search results
+    Return the profile, or None if there is no resume, the extraction failed
+    (features then fall back to the resume text or images) or, without wait,
+    it is not ready yet.
     """
-    # Retrieve Tavily API key from environment variables
-    tavily_api_key = os.getenv("TAVILY_API_KEY")
-    
-    if not tavily_api_key:
-        return "❌ Error: Tavily API key is missing"
-    
-    # Use Gemini to extract key context for search
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    try:
-        # Extract skills from resume
-        skills_response = model.generate_content(f"""
-        Extract the top 10 most relevant professional skills from this resume:
-        {resume_text}
-        Return as a comma-separated list of skills.
-        """)
-        resume_skills = skills_response.text.strip()
-        
-        # Extract job title and key requirements
-        title_response = model.generate_content(f"""
-        Extract the exact job title and 3-5 most critical requirements from this job description:
-        {job_desc_input}
-        
-        Format your response as:
-        Job Title: [Exact Job Title]
-        Key Requirements: 
-        1. [Requirement 1]
-        2. [Requirement 2]
-        3. [Requirement 3]
-        """)
-        job_context = title_response.text.strip()
-        
-        # Extract job title
-        job_title = job_context.split('Job Title:')[1].split('\n')[0].strip()
-        
-        # Construct search query
-        search_query = f'"{job_title}" jobs {" ".join(resume_skills.split(",")[:3])} hiring now'
-        
-        # Prepare Tavily API request
-        tavily_payload = {
-            "api_key": tavily_api_key,
-            "query": search_query,
-            "search_depth": "advanced",
-            "include_domains": [
-                "linkedin.com",
-                "indeed.com", 
-                "glassdoor.com", 
-                "monster.com"
-            ],
-            "max_results": count,
-            "include_raw_content": True
-        }
-        
-        # Perform the search
-        response = requests.post(
-            "https://api.tavily.com/search",
-            json=tavily_payload
-        )
-        
-        # Check response
-        if response.status_code != 200:
-            return f"❌ Tavily Search API error: {response.status_code}\n{response.text}"
-        
-        # Parse search results
-        search_results = response.json()
-        
-        # Generate markdown results
-        markdown_results = "## 🔍 Personalized Job Search Results\n\n"
-        
-        # Check if results exist
-        if not search_results.get('results', []):
-            return "❌ No job results found"
-        
-        # Process each search result
-        for idx, result in enumerate(search_results['results'], 1):
-            # Extract job details
-            title = result.get('title', 'Untitled Job')
-            link = result.get('url', '#')
-            snippet = result.get('raw_content', 'No description available')
-            
-            # Analyze job relevance
-            relevance_prompt = f"""
-            Analyze the relevance of this job to the candidate's profile:
-            
-            Candidate Skills: {resume_skills}
-            Job Title: {title}
-            Job Description: {snippet}
-            
-            Provide:
-            1. Relevance Score (0-100%)
-            2. Key Matching Skills
-            3. Potential Fit Commentary
-            """
-            
-            try:
-                relevance_response = model.generate_content(relevance_prompt)
-                relevance_analysis = relevance_response.text
-            except Exception as e:
-                relevance_analysis = f"Relevance analysis failed: {str(e)}"
-            
-            # Format markdown entry
-            markdown_results += f"### {idx}. {title}\n\n"
-            markdown_results += f"**Link:** [{link}]({link})\n\n"
-            markdown_results += f"**Description:** {snippet}\n\n"
-            markdown_results += f"**Relevance Analysis:**\n{relevance_analysis}\n\n"
-            markdown_results += "---\n\n"
-        
-        return markdown_results
+    stored = st.session_state.get("resume_profile")
+    if stored is None or stored["failed"]:
+        return None
+    if stored["profile"] is None:
+        job = get_job_runner().get(stored["job_id"])
+        if job is None or not (wait or job.finished):
+            return None
+        try:
+            stored["profile"] = wait_for_job(job, "Building your profile...")
+        except JobCancelled:
+            # A cancel is not a failure: the extraction starts again on the next run
+            stored["job_id"] = None
+            st.warning("Profile extraction cancelled, the full resume is sent instead.")
+            return None
+        except Exception as e:
+            stored["failed"] = True
+            st.warning(f"Could not build a profile from your resume, the full resume is sent instead: {e}")
+            return None
+    return stored["profile"]
+
+# Function to get the compact profile sent with prompts, or None
+def profile_prompt_text(prefer=False):
+    # Feature prompts only send the profile in place of page images, so with resume text there is nothing to wait for
+    if prompt_resume_text and not prefer:
+        return None
+    profile = current_profile()
+    return profile_summary(profile) if profile is not None else None
+
+# Function to render job search results: trimmed snippets, with each full listing in an expander
+def render_job_results(results):
+    if not results["jobs"]:
+        st.warning("No job results found")
+        return
+    st.markdown("## 🔍 Personalized Job Search Results")
+    for idx, job in enumerate(results["jobs"], 1):
+        st.markdown(f"### {idx}. {job['title']}")
+        st.markdown(f"**Link:** [{job['link']}]({job['link']})")
+        st.markdown(f"**Description:** {job['snippet']}")
+        st.caption(f"Skill overlap: {job['local_score']}% ({', '.join(job['matching_skills']) or 'none'})")
+        if job["analysis"] is not None:
+            st.markdown(f"**Relevance Analysis:**\n{job['analysis']}")
+        if len(job["content"]) > len(job["snippet"]):
+            with st.expander("Full listing"):
+                st.text(job["content"])
+        st.markdown("---")
+
+# Function to build the ranked job description table
+def ranking_table(rows):
+    # pandas is only needed on this tab, so it is not imported at startup
+    import pandas as pd
+    return pd.DataFrame(rows, columns=["rank", "job", "local_score", "match_percentage", "verdict", "gaps",
+                                       "error"]).rename(columns={
+        "rank": "Rank", "job": "Job", "local_score": "Keyword Match %", "match_percentage": "Gemini Match %",
+        "verdict": "Verdict", "gaps": "Gaps", "error": "Error"
+    })
+
+# Function to generate suggestions for improvement
+def generate_suggestions(pdf_content, job_desc, use_cache=True, on_text=None, resume_text=None, profile_text=None):
+    return get_gemini_response(SUGGESTIONS_PROMPT, pdf_content, job_desc, use_cache, on_text, resume_text,
+                               profile_text)
+
+# Function to draw a donut gauge as inline SVG
+def match_donut_svg(match_percentage, size=200, thickness=30):
+    radius = (size - thickness) / 2
+    circumference = 2 * math.pi * radius
+    filled = circumference * max(0, min(100, match_percentage)) / 100
+    center = size / 2
+    return (
+        f'<svg width="{size}" height="{size}" viewBox="0 0 {size} {size}" role="img" '
+        f'aria-label="{match_percentage}% match">'
+        f'<circle cx="{center}" cy="{center}" r="{radius}" fill="none" stroke="#ECEFF1" stroke-width="{thickness}"/>'
+        f'<circle cx="{center}" cy="{center}" r="{radius}" fill="none" stroke="#1E88E5" stroke-width="{thickness}" '
+        f'stroke-dasharray="{filled:.2f} {circumference:.2f}" transform="rotate(-90 {center} {center})"/>'
+        f'</svg>'
+    )
+
+# Function to display a match percentage with a donut gauge
+def render_match_gauge(match_percentage, label):
+    st.markdown("<div class='percentage-container'>", unsafe_allow_html=True)
+    st.markdown(f"<span class='percentage'>{match_percentage}%</span>", unsafe_allow_html=True)
+    st.markdown(f"<span class='match-text'>{label}</span>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
     
-    except Exception as e:
-        return f"❌ Comprehensive search error: {str(e)}"
+    # Create a donut chart
+    with stage("render_chart"):
+        st.markdown(match_donut_svg(match_percentage), unsafe_allow_html=True)
+
+# Function to format rows as a markdown table (cheaper than a dataframe for small sidebar tables)
+def markdown_table(rows, columns):
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    for row in rows:
+        lines.append("| " + " | ".join("" if row.get(c) is None else str(row.get(c)) for c in columns) + " |")
+    return "\n".join(lines)
+
 # Streamlit App
 st.set_page_config(page_title="ResAi", layout="wide")
 
@@ -283,12 +323,17 @@ st.markdown("<h1 class='main-header'>ResAi</h1>", unsafe_allow_html=True)
 with st.sidebar:
     selected = option_menu(
         "Navigation",
-        ["Resume Analysis", "Resume Optimizer", "Cover Letter Generator", "Interview Prep", "Market Position", "Skill Development", "Search"],
-        icons=["file-earmark-text", "magic", "envelope", "chat-dots", "graph-up", "book", "search"],
+        ["Resume Analysis", "Resume Optimizer", "Cover Letter Generator", "Interview Prep", "Market Position", "Skill Development", "Full Report", "Rank Jobs", "Search"],
+        icons=["file-earmark-text", "magic", "envelope", "chat-dots", "graph-up", "book", "collection", "list-ol", "search"],
         menu_icon="cast",
         default_index=0,
     )
     
+    # Per-call bypass of the response cache
+    fresh_generation = st.checkbox("Fresh generation (bypass response cache)", value=False)
+    use_cache = not fresh_generation
+    stream_responses = st.checkbox("Stream responses as they are generated", value=True)
+    
     # Add contact info and credits
     st.markdown("---")
     st.markdown("### ResAi Team")
@@ -298,6 +343,9 @@ with st.sidebar:
     "Anthony")
     st.markdown("Contact: tandiaa@whitman.edu")
 
+# Collect per-stage timings for this rerun
+metrics_run = start_run(f"app:{selected}")
+
 # Common inputs
 job_desc_input = st.text_area("Job Description:", key="job_desc", height=200)
 uploaded_file = st.file_uploader("Upload your resume (PDF)...", type=["pdf"])
@@ -305,15 +353,30 @@ uploaded_file = st.file_uploader("Upload your resume (PDF)...", type=["pdf"])
 # Initialize variables
 pdf_content = None
 resume_text = ""
-images = []
+prompt_resume_text = None
 
 # Check if file is uploaded
 if uploaded_file is not None:
     try:
         with st.spinner("Processing your resume..."):
-            pdf_content, images = input_pdf_setup(uploaded_file)
-            resume_text = extract_text_from_pdf(images)
+            pdf_content, resume_text, page_sources = process_resume(uploaded_file)
             st.success("Resume processed successfully!")
+            st.caption(", ".join(f"{page_sources.count(source)} page(s) via {source}"
+                                 for source in ("text-layer", "ocr", "failed") if source in page_sources))
+            # Prompts send the extracted text instead of page images unless some page could not be read
+            if "failed" not in page_sources:
+                prompt_resume_text = resume_text
+        # Features send this compact profile instead of the resume; only they wait for it
+        start_resume_profile(uploaded_file.getvalue(), pdf_content, prompt_resume_text, use_cache)
+        ready_profile = current_profile(wait=False)
+        if ready_profile is not None:
+            with st.expander("Your extracted profile"):
+                st.markdown(profile_summary(ready_profile))
+    except JobCancelled:
+        st.warning("Resume processing was cancelled.")
+        if st.button("Restart processing"):
+            del st.session_state["resume_job"]
+            st.rerun()
     except Exception as e:
         st.error(f"Error processing PDF: {e}")
 
@@ -321,50 +384,46 @@ if uploaded_file is not None:
 if selected == "Resume Analysis" and pdf_content is not None and job_desc_input.strip() != "":
     col1, col2 = st.columns([1, 1])
     
+    # Instant local score; the Gemini analysis below refines it
+    local_match = local_match_score(resume_text, job_desc_input)
+    
+    with col2:
+        st.markdown("### Term Coverage")
+        if local_match["coverage"]:
+            # pandas is only needed on this tab, so it is not imported at startup
+            import pandas as pd
+            coverage_df = pd.DataFrame(local_match["coverage"]).rename(columns={
+                "term": "Term", "weight": "Weight", "resume_count": "In Resume", "matched": "Matched"
+            })
+            st.dataframe(coverage_df, hide_index=True, use_container_width=True)
+    
     with col1:
         st.markdown("<h2 class='sub-header'>Resume Analysis</h2>", unsafe_allow_html=True)
+        score_area = st.empty()
+        with score_area.container():
+            render_match_gauge(local_match["score"], "Keyword Match with Job Description (instant estimate)")
         analysis_button = st.button("Analyze Resume", type="primary")
         
         if analysis_button:
             with st.spinner("Analyzing your resume..."):
-                input_prompt1 = """
-                You are an experienced Technical Human Resource Manager with 15+ years of experience in talent acquisition.
-                Your task is to review the provided resume against the job description.
-                
-                Please provide a detailed professional evaluation with these sections:
-                1. OVERVIEW: A brief summary of the candidate's profile
-                2. STRENGTHS: Key qualifications that align well with the role (be specific)
-                3. GAPS: Areas where the candidate could improve or lacks required qualifications
-                4. MATCH PERCENTAGE: Exact percentage of how well the resume matches the job requirements
-                5. RECOMMENDATION: Whether to proceed with the candidate, and why
+                input_prompt1 = ANALYSIS_PROMPT
                 
-                Use a professional tone and provide actionable insights.
-                Start with the match percentage on its own line, formatted as "XX%"
-                """
-                
-                response = get_gemini_response(input_prompt1, pdf_content, job_desc_input)
+                # The match gauge is refined once the full analysis has streamed in below it
+                output = st.empty()
+                response = get_gemini_response(input_prompt1, pdf_content, job_desc_input, use_cache,
+                                               on_text=stream_to(output) if stream_responses else None,
+                                               resume_text=prompt_resume_text, profile_text=profile_prompt_text())
                 
                 if response:
                     # Extract percentage
                     match_percentage = parse_percentage(response)
                     
                     # Display percentage with gauge
-                    st.markdown("<div class='percentage-container'>", unsafe_allow_html=True)
-                    st.markdown(f"<span class='percentage'>{match_percentage}%</span>", unsafe_allow_html=True)
-                    st.markdown(f"<span class='match-text'>Match with Job Description</span>", unsafe_allow_html=True)
-                    st.markdown("</div>", unsafe_allow_html=True)
-                    
-                    # Create a donut chart
-                    fig, ax = plt.subplots(figsize=(3, 3))
-                    ax.pie([match_percentage, 100-match_percentage], 
-                           colors=['#1E88E5', '#ECEFF1'], 
-                           startangle=90, 
-                           wedgeprops=dict(width=0.3))
-                    ax.axis('equal')
-                    st.pyplot(fig)
+                    with score_area.container():
+                        render_match_gauge(match_percentage, "Match with Job Description")
                     
                     # Display full analysis
-                    st.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
+                    output.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
 
 # Resume Optimizer
 elif selected == "Resume Optimizer" and pdf_content is not None and job_desc_input.strip() != "":
@@ -375,8 +434,21 @@ elif selected == "Resume Optimizer" and pdf_content is not None and job_desc_inp
     with col1:
         st.markdown("### Resume Content")
         if resume_text:
-            highlighted_text, keywords = highlight_keywords(resume_text, job_desc_input)
-            st.markdown(highlighted_text)
+            profile = current_profile()
+            key = job_key("highlight", resume_text, job_desc_input, use_cache, profile)
+            # This runs on every rerun of the tab: keep the session's finished job instead of starting a new one
+            job = get_job_runner().get(st.session_state.get("highlight_job"))
+            if job is None or job.key != key or job.status in ("failed", "cancelled"):
+                job = start_job("highlight", key, highlight_keywords, resume_text, job_desc_input, use_cache,
+                                profile)
+                st.session_state.highlight_job = job.id
+            try:
+                highlighted_text, keywords = wait_for_job(job, "Highlighting keywords...")
+                st.markdown(highlighted_text)
+            except JobCancelled:
+                st.warning("Keyword highlighting cancelled.")
+            except Exception as e:
+                st.error(f"Error highlighting keywords: {e}")
     
     with col2:
         st.markdown("### Improvement Suggestions")
@@ -384,9 +456,12 @@ elif selected == "Resume Optimizer" and pdf_content is not None and job_desc_inp
         
         if optimize_button:
             with st.spinner("Generating suggestions..."):
-                suggestions = generate_suggestions(pdf_content, job_desc_input)
+                output = st.empty()
+                suggestions = generate_suggestions(pdf_content, job_desc_input, use_cache,
+                                                   on_text=stream_to(output) if stream_responses else None,
+                                                   resume_text=prompt_resume_text, profile_text=profile_prompt_text())
                 if suggestions:
-                    st.markdown(f"<div class='highlight'>{suggestions}</div>", unsafe_allow_html=True)
+                    output.markdown(f"<div class='highlight'>{suggestions}</div>", unsafe_allow_html=True)
 
 # Cover Letter Generator
 elif selected == "Cover Letter Generator" and pdf_content is not None and job_desc_input.strip() != "":
@@ -402,34 +477,16 @@ elif selected == "Cover Letter Generator" and pdf_content is not None and job_de
     
     if generate_button:
         with st.spinner("Generating your personalized cover letter..."):
-            prompt = f"""
-            You are a professional resume writer with expertise in the tech industry.
-            
-            Create a personalized, compelling cover letter based on the resume and job description provided.
-            
-            Use these details:
-            - Company: {company_name if company_name else "[Company Name]"}
-            - Hiring Manager: {hiring_manager if hiring_manager else "Hiring Manager"}
-            
-            Focus areas: {", ".join(customize_options) if customize_options else "balanced approach"}
+            prompt = cover_letter_prompt(company_name, hiring_manager, customize_options)
             
-            The cover letter should:
-            1. Be approximately 300-400 words
-            2. Follow professional business letter format
-            3. Have a compelling introduction, meaningful body paragraphs, and a call-to-action conclusion
-            4. Highlight the candidate's most relevant skills and experiences
-            5. Address how the candidate meets the specific job requirements
-            6. Show enthusiasm for the role and company
-            7. Avoid generic language and be tailored to this specific opportunity
-            
-            Do not use placeholder text - create a complete, ready-to-use cover letter.
-            """
-            
-            cover_letter = get_gemini_response(prompt, pdf_content, job_desc_input)
+            output = st.empty()
+            cover_letter = get_gemini_response(prompt, pdf_content, job_desc_input, use_cache,
+                                               on_text=stream_to(output) if stream_responses else None,
+                                               resume_text=prompt_resume_text, profile_text=profile_prompt_text())
             
             if cover_letter:
                 # Display in a nice format
-                st.markdown(f"<div class='highlight'>{cover_letter}</div>", unsafe_allow_html=True)
+                output.markdown(f"<div class='highlight'>{cover_letter}</div>", unsafe_allow_html=True)
                 
                 # Add a download button
                 st.download_button(
@@ -447,19 +504,14 @@ elif selected == "Interview Prep" and pdf_content is not None and job_desc_input
     
     if prep_button:
         with st.spinner("Creating your interview preparation guide..."):
-            prompt = """
-            You are an expert hiring manager. Based on the resume and job description provided, create:
-            1. 5 technical questions likely to be asked in the interview
-            2. 3 behavioral questions specific to this role
-            3. 2 questions about gaps or potential weaknesses in the candidate's profile
-            
-            For each question, provide a sample answer strategy (not a complete answer).
-            Format your response clearly with sections and numbered questions.
-            """
-            response = get_gemini_response(prompt, pdf_content, job_desc_input)
+            prompt = INTERVIEW_PREP_PROMPT
+            output = st.empty()
+            response = get_gemini_response(prompt, pdf_content, job_desc_input, use_cache,
+                                           on_text=stream_to(output) if stream_responses else None,
+                                           resume_text=prompt_resume_text, profile_text=profile_prompt_text())
             
             if response:
-                st.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
+                output.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
 
 # Market Position
 elif selected == "Market Position" and pdf_content is not None and job_desc_input.strip() != "":
@@ -469,19 +521,14 @@ elif selected == "Market Position" and pdf_content is not None and job_desc_inpu
     
     if position_button:
         with st.spinner("Analyzing your market position..."):
-            prompt = """
-            You are an experienced hiring manager. Create a profile of an ideal candidate for this job description.
-            Then compare the provided resume against this ideal profile.
-            
-            Format your response in these sections:
-            1. Ideal Candidate Profile: Key skills, experience, and qualifications
-            2. Comparison: How the candidate meets or falls short of each key requirement
-            3. Competitive Analysis: Where this candidate would rank against typical applicants (top 10%, average, etc.)
-            """
-            response = get_gemini_response(prompt, pdf_content, job_desc_input)
+            prompt = MARKET_POSITION_PROMPT
+            output = st.empty()
+            response = get_gemini_response(prompt, pdf_content, job_desc_input, use_cache,
+                                           on_text=stream_to(output) if stream_responses else None,
+                                           resume_text=prompt_resume_text, profile_text=profile_prompt_text())
             
             if response:
-                st.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
+                output.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
 
 # Skill Development
 elif selected == "Skill Development" and pdf_content is not None and job_desc_input.strip() != "":
@@ -491,21 +538,116 @@ elif selected == "Skill Development" and pdf_content is not None and job_desc_in
     
     if skill_button:
         with st.spinner("Creating your personalized skill development plan..."):
-            prompt = """
-            You are a career development coach. Based on the resume and job description, create a 3-month skill development plan for the candidate.
+            prompt = SKILL_DEVELOPMENT_PROMPT
+            output = st.empty()
+            response = get_gemini_response(prompt, pdf_content, job_desc_input, use_cache,
+                                           on_text=stream_to(output) if stream_responses else None,
+                                           resume_text=prompt_resume_text, profile_text=profile_prompt_text())
             
-            Include:
-            1. Top 3-5 skills to develop based on gaps in the resume
-            2. Specific resources to learn each skill (courses, certifications, projects)
-            3. A timeline with weekly goals
-            4. How to demonstrate these new skills on the resume
+            if response:
+                output.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
+
+# Full Report
+elif selected == "Full Report" and pdf_content is not None and job_desc_input.strip() != "":
+    st.markdown("<h2 class='sub-header'>Full Report</h2>", unsafe_allow_html=True)
+    st.markdown("Runs every analysis at once against your resume; each section appears as soon as it is ready.")
+    
+    company_name = st.text_input("Company Name (for the cover letter):")
+    max_parallel = st.slider("Parallel requests", 1, len(REPORT_SECTIONS), min(REPORT_MAX_WORKERS, len(REPORT_SECTIONS)))
+    
+    report_button = st.button("Run All Analyses", type="primary")
+    
+    if report_button:
+        prompts = {**FEATURE_PROMPTS, "cover_letter": cover_letter_prompt(company_name)}
+        
+        # One placeholder per section in report order, filled in completion order
+        placeholders = {}
+        for feature, title in REPORT_SECTIONS.items():
+            st.markdown(f"### {title}")
+            placeholders[feature] = st.empty()
+            placeholders[feature].info("Waiting for results...")
+        
+        def show_sections(sections):
+            for feature, response in sections["responses"].items():
+                placeholders[feature].markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
+            for feature, error in sections["errors"].items():
+                placeholders[feature].error(f"Error generating this section: {error}")
+        
+        prompt_profile_text = profile_prompt_text()
+        key = resume_job_key("report", pdf_content, prompt_resume_text, prompt_profile_text, prompts, job_desc_input,
+                             max_parallel, use_cache)
+        job = start_job("report", key, run_report, pdf_content, job_desc_input, prompt_resume_text, prompts,
+                        max_parallel, use_cache, prompt_profile_text)
+        responses = {}
+        errors = {}
+        start = time.perf_counter()
+        try:
+            with stage(f"feature:{selected}"):
+                responses, errors = wait_for_job(job, "Running all analyses...", show_sections)
+            show_sections({"responses": responses, "errors": errors})
+            st.caption(f"All sections finished in {time.perf_counter() - start:.1f}s")
+        except JobCancelled:
+            st.warning("Report cancelled.")
+        except Exception as e:
+            st.error(f"Error generating the report: {e}")
+        
+        if responses:
+            st.download_button(
+                label="Download Full Report",
+                data=build_report_document(responses, errors),
+                file_name="resai_report.md",
+                mime="text/markdown"
+            )
+
+# Rank Jobs
+elif selected == "Rank Jobs" and pdf_content is not None:
+    st.markdown("<h2 class='sub-header'>Rank Job Descriptions</h2>", unsafe_allow_html=True)
+    st.caption("Upload CSV files (a description column and an optional title column) or text files, or paste "
+               f"job descriptions separated by a line containing only `{RANK_SEPARATOR}`. Every job description "
+               "gets an instant keyword match; the best ones are then analyzed by Gemini.")
+    
+    job_files = st.file_uploader("Job descriptions (CSV or text)", type=["csv", "txt", "md"],
+                                 accept_multiple_files=True)
+    pasted_jobs = st.text_area("Or paste job descriptions:", key="rank_jobs_text", height=200)
+    top_k = st.slider("Job descriptions analyzed by Gemini", 0, 20, RANK_TOP_K)
+    
+    rank_button = st.button("Rank Job Descriptions", type="primary")
+    
+    if rank_button:
+        try:
+            jobs = load_job_descriptions([(f.name, f.getvalue()) for f in job_files or ()], pasted_jobs)
+        except ValueError as e:
+            st.error(str(e))
+            jobs = None
+        if jobs == []:
+            st.warning("No job descriptions found.")
+        elif jobs:
+            # The resume was processed once above; only the job descriptions vary
+            prompt_profile_text = profile_prompt_text(prefer=True)
+            key = resume_job_key("rank", pdf_content, prompt_resume_text, prompt_profile_text, jobs, resume_text,
+                                 top_k, use_cache)
+            job = start_job("rank", key, rank_job_descriptions, jobs, resume_text, pdf_content, prompt_resume_text,
+                            prompt_profile_text, top_k, use_cache=use_cache)
+            table = st.empty()
             
-            Format your response in a clear, actionable plan.
-            """
-            response = get_gemini_response(prompt, pdf_content, job_desc_input)
+            def show_ranking(rows):
+                # Column headers sort the table in the browser
+                table.dataframe(ranking_table(rows), hide_index=True, use_container_width=True)
             
-            if response:
-                st.markdown(f"<div class='highlight'>{response}</div>", unsafe_allow_html=True)
+            try:
+                rows = wait_for_job(job, f"Ranking {len(jobs)} job descriptions...", on_partial=show_ranking)
+                show_ranking(rows)
+                ranking_df = ranking_table(rows)
+                st.download_button(
+                    label="Download Ranking",
+                    data=ranking_df.to_csv(index=False),
+                    file_name="resai_ranking.csv",
+                    mime="text/csv"
+                )
+            except JobCancelled:
+                st.warning("Ranking cancelled.")
+            except Exception as e:
+                st.error(f"Error ranking job descriptions: {e}")
 
 # Search
 elif selected == "Search" and pdf_content is not None and job_desc_input.strip() != "":
@@ -519,14 +661,21 @@ elif selected == "Search" and pdf_content is not None and job_desc_input.strip()
     if search_button:
         with st.spinner("Searching for personalized job opportunities..."):
             # Perform job search
-            job_results = tavily_job_search(
-                resume_text=resume_text, 
-                job_desc_input=job_desc_input,
-                count=num_results
-            )
-            
-            # Display results
-            st.markdown(job_results)
+            profile = current_profile()
+            key = job_key("search", resume_text, job_desc_input, num_results, use_cache, profile)
+            job = start_job("search", key, search_jobs, resume_text=resume_text,
+                            job_desc_input=job_desc_input, count=num_results, use_cache=use_cache,
+                            profile=profile)
+            try:
+                with stage("job_search"):
+                    job_results = wait_for_job(job, "Searching...")
+                
+                # Display results
+                render_job_results(job_results)
+            except JobCancelled:
+                st.warning("Search cancelled.")
+            except Exception as e:
+                st.error(f"Error searching for jobs: {e}")
 # Show homepage content
 else:
     st.info("👈 Please upload your resume and enter a job description to get started.")
@@ -540,6 +689,8 @@ else:
         "🎯 **Interview Prep**: Prepare with likely interview questions and answer strategies",
         "📈 **Market Position**: Compare your profile against an ideal candidate",
         "📚 **Skill Development**: Get a personalized skill development plan",
+        "🗂 **Full Report**: Run every analysis at once and download a single report",
+        "📋 **Rank Jobs**: Rank many job descriptions against your resume in one go",
         "🔍 **Search**: Find relevant information to enhance your application"
     ]
     for feature in features:
@@ -549,19 +700,45 @@ else:
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Model Status Checker")
 if st.sidebar.button("Check Model Status"):
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content("Hello, please respond with 'OK' if you can receive this message.")
-        if "OK" in response.text or "ok" in response.text.lower():
-            st.sidebar.markdown("✅ **gemini-1.5-flash**: Available")
-        else:
-            st.sidebar.markdown("⚠️ **gemini-1.5-flash**: Unexpected response")
-    except Exception as e:
-        error_msg = str(e)
-        if "429" in error_msg or "quota" in error_msg or "rate limit" in error_msg:
-            st.sidebar.markdown("❌ **gemini-1.5-flash**: Rate limited")
+    # Every configured model is probed at once, without retries, so a rate limit shows up as its status;
+    # results are shared by all sessions for a short while
+    checked_at, statuses = get_gemini_client().model_status()
+    routes = get_gemini_client().router.routes
+    for status in statuses:
+        tasks = ", ".join(task for task, models in routes.items() if status["model"] in models)
+        if status["status"] == "available":
+            st.sidebar.markdown(f"✅ **{status['model']}** ({tasks}): Available")
+        elif status["status"] == "unexpected":
+            st.sidebar.markdown(f"⚠️ **{status['model']}** ({tasks}): Unexpected response")
+        elif status["status"] == "rate_limited":
+            st.sidebar.markdown(f"❌ **{status['model']}** ({tasks}): Rate limited")
         else:
-            st.sidebar.markdown(f"❌ **gemini-1.5-flash**: Error: {error_msg[:50]}...")
+            st.sidebar.markdown(f"❌ **{status['model']}** ({tasks}): Error: {status['detail'][:50]}...")
+    st.sidebar.caption(f"Checked {time.strftime('%H:%M:%S', time.localtime(checked_at))}")
+
+# Add performance panel
+st.sidebar.markdown("---")
+st.sidebar.markdown("### Performance")
+run_summary = finish_run(metrics_run)
+if run_summary["stages"]:
+    rows = [{**record, "ms": round(record["seconds"] * 1000, 1)} for record in run_summary["stages"]]
+    columns = [c for c in ("stage", "ms", "bytes", "prompt_tokens", "output_tokens", "error")
+               if any(c in row for row in rows)]
+    st.sidebar.markdown(markdown_table(rows, columns))
+    st.sidebar.caption(f"This run: {run_summary['seconds']:.2f}s")
+else:
+    st.sidebar.caption("No instrumented stages ran in this run.")
+with st.sidebar.expander("Totals since startup"):
+    totals = aggregates()
+    if totals:
+        rows = [{"stage": name, **values, "seconds": round(values["seconds"], 3),
+                 "max_seconds": round(values["max_seconds"], 3)} for name, values in sorted(totals.items())]
+        st.markdown(markdown_table(rows, ["stage", "calls", "errors", "seconds", "max_seconds", "bytes",
+                                          "prompt_tokens", "output_tokens"]))
+    st.download_button("Download JSON lines", aggregates_jsonl(), file_name="resai_metrics.jsonl",
+                       mime="application/json")
+    st.download_button("Download Prometheus text", prometheus_text(), file_name="resai_metrics.prom",
+                       mime="text/plain")
 
 # Add footer
 st.markdown("---")
@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for ResAi: synthetic resumes, stubbed Gemini/Tavily backends and a JSON report.
+"""
@@ -0,0 +1,262 @@
+"""
+Offline benchmark runner: times the resume pipeline against stubbed Gemini and Tavily backends.
+
+    python -m bench --pages 1,5,20 --iterations 5 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from .stubs import StubBehavior, StubTavilyServer, install_gemini_stub
+from .synthetic import job_description, synthetic_resume
+
+# Function to parse a comma-separated list of integers
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+# Function to build the argument parser
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench", description="Offline ResAi benchmarks with stubbed backends")
+    parser.add_argument("--pages", type=parse_int_list, default=[1, 5, 20],
+                        help="Comma-separated resume page counts (default: 1,5,20)")
+    parser.add_argument("--kinds", default="text,scanned",
+                        help="Comma-separated resume kinds: text (text layer) and/or scanned (default: both)")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs per scenario (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Parallel callers for the throughput measurement (default: 4)")
+    parser.add_argument("--scenarios", default="",
+                        help="Comma-separated scenario name prefixes to run (default: all)")
+    parser.add_argument("--gemini-latency-ms", type=float, default=200.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0,
+                        help="Fraction of Gemini calls failing with a retryable 429 (default: 0)")
+    parser.add_argument("--gemini-output-words", type=int, default=300)
+    parser.add_argument("--tavily-latency-ms", type=float, default=150.0)
+    parser.add_argument("--tavily-jitter-ms", type=float, default=30.0)
+    parser.add_argument("--tavily-error-rate", type=float, default=0.0,
+                        help="Fraction of Tavily calls answered with a retryable 503 (default: 0)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="JSON results file, or - for stdout (default: -)")
+    return parser
+
+# Function to summarize latencies in milliseconds
+def latency_summary(seconds):
+    if not seconds:
+        return None
+    ordered = sorted(s * 1000 for s in seconds)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+# Function to measure one scenario: sequential latency, concurrent throughput and peak memory
+def measure(name, fn, params, iterations, concurrency, setup=None):
+    """
+    Args:
+        name (str): Scenario name
+        fn (callable): Zero-argument callable running the operation once
+        params (dict): Scenario parameters recorded with the result
+        iterations (int): Timed sequential runs, also the number of concurrent runs
+        concurrency (int): Parallel callers for the throughput measurement
+        setup (callable): Untimed reset run before each timed run and before the concurrent batch
+
+    Returns:
+        dict: Scenario result
+    """
+    setup = setup or (lambda: None)
+    result = {"scenario": name, "params": params, "errors": 0}
+
+    # Peak Python heap of a single run (tracemalloc slows the run, so it is not timed)
+    setup()
+    tracemalloc.start()
+    try:
+        fn()
+    except Exception as e:
+        result["errors"] += 1
+        result["last_error"] = str(e)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["peak_heap_bytes"] = peak
+
+    latencies = []
+    for _ in range(iterations):
+        setup()
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            result["errors"] += 1
+            result["last_error"] = str(e)
+        latencies.append(time.perf_counter() - start)
+    result["latency_ms"] = latency_summary(latencies)
+
+    def timed_call(_):
+        try:
+            fn()
+            return True
+        except Exception:
+            return False
+
+    setup()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        outcomes = list(executor.map(timed_call, range(iterations)))
+    wall = time.perf_counter() - start
+    result["errors"] += outcomes.count(False)
+    result["throughput_per_s"] = iterations / wall if wall > 0 else None
+    result["concurrency"] = concurrency
+    return result
+
+# Function to record a scenario that cannot run in this environment
+def skipped(name, params, reason):
+    return {"scenario": name, "params": params, "skipped": reason}
+
+# Function to describe the environment, so results from different machines are not compared blindly
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+        "pdftoppm": shutil.which("pdftoppm") is not None,
+        "pdftotext": shutil.which("pdftotext") is not None,
+    }
+
+# Function to run the benchmark suite
+def run(args):
+    gemini = StubBehavior(args.gemini_latency_ms, args.gemini_jitter_ms, args.gemini_error_rate, args.seed)
+    tavily = StubBehavior(args.tavily_latency_ms, args.tavily_jitter_ms, args.tavily_error_rate, args.seed + 1)
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    env = environment()
+    started = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+    with tempfile.TemporaryDirectory() as cache_dir, StubTavilyServer(tavily) as tavily_server:
+        # Settings are read when resai is imported, so the environment is prepared first:
+        # fresh caches, the stub Tavily endpoint, no page cap and no client-side rate limiting
+        os.environ.update({
+            "RESAI_CACHE_DIR": cache_dir,
+            "TAVILY_API_URL": tavily_server.url,
+            "TAVILY_API_KEY": "stub",
+            "GOOGLE_API_KEY": "stub",
+            "RESAI_MAX_PAGES": str(max(args.pages)),
+            "RESAI_GEMINI_RPM": "1000000",
+            "RESAI_GEMINI_TPM": "1000000000",
+        })
+        install_gemini_stub(gemini, args.gemini_output_words)
+        from resai import (
+            extract_text_from_pdf,
+            generate_feature_response,
+            highlight_keywords,
+            input_pdf_setup,
+            tavily_job_search,
+        )
+        from resai.llm import llm_cache_connect
+        from resai.metrics import aggregates
+        from resai.prompts import FEATURE_PROMPTS
+
+        def wanted(name):
+            return not selected or any(name.startswith(prefix) for prefix in selected)
+
+        def clear_response_cache():
+            # OCR always goes through the response cache, so it is emptied to time real (stubbed) calls
+            conn = llm_cache_connect()
+            with conn:
+                conn.execute("DELETE FROM llm_responses")
+            conn.close()
+
+        job_desc = job_description(args.seed)
+        results = []
+        for kind in [k.strip() for k in args.kinds.split(",") if k.strip()]:
+            for page_count in args.pages:
+                resume = synthetic_resume(page_count, kind, args.seed)
+                params = {"kind": kind, "pages": page_count, "pdf_bytes": len(resume["pdf"])}
+                print(f"{kind} resume, {page_count} page(s)", file=sys.stderr)
+
+                if wanted("input_pdf_setup"):
+                    if env["pdftoppm"]:
+                        results.append(measure("input_pdf_setup",
+                                               lambda: input_pdf_setup(io.BytesIO(resume["pdf"])),
+                                               params, args.iterations, args.concurrency))
+                    else:
+                        results.append(skipped("input_pdf_setup", params, "poppler (pdftoppm) is not installed"))
+
+                if wanted("extract_text_from_pdf"):
+                    # Without pdftotext every page goes through the (stubbed) OCR path
+                    results.append(measure("extract_text_from_pdf",
+                                           lambda: extract_text_from_pdf(resume["pages"], resume["pdf"]),
+                                           {**params, "text_layer_available": env["pdftotext"]},
+                                           args.iterations, args.concurrency, setup=clear_response_cache))
+
+        # Resume-level features use a two-page resume, sent both as text and as page images
+        resume = synthetic_resume(2, "scanned", args.seed)
+        pdf_parts = [{"mime_type": "image/jpeg", "data": page} for page in resume["pages"]]
+        params = {"pages": 2, "resume_chars": len(resume["text"]), "job_desc_chars": len(job_desc)}
+
+        if wanted("highlight_keywords"):
+            results.append(measure("highlight_keywords",
+                                   lambda: highlight_keywords(resume["text"], job_desc, use_cache=False),
+                                   params, args.iterations, args.concurrency))
+        if wanted("tavily_job_search"):
+            results.append(measure("tavily_job_search",
+                                   lambda: tavily_job_search(resume["text"], job_desc, count=5, use_cache=False),
+                                   {**params, "count": 5}, args.iterations, args.concurrency))
+        for feature, prompt in FEATURE_PROMPTS.items():
+            for payload, resume_text in (("text", resume["text"]), ("image", None)):
+                name = f"feature:{feature}"
+                if wanted(name):
+                    results.append(measure(
+                        name,
+                        lambda: generate_feature_response(prompt, pdf_parts, job_desc, use_cache=False,
+                                                          resume_text=resume_text),
+                        {**params, "payload": payload}, args.iterations, args.concurrency
+                    ))
+
+        stages = aggregates()
+
+    return {
+        "started": started,
+        "environment": env,
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+        "stages": stages,
+        "stubs": {"gemini": gemini.stats(), "tavily": tavily.stats()},
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+# Entry point for `python -m bench`
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Library diagnostics go to stderr, so stdout carries only the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {len(report['results'])} result(s) to {args.output}", file=sys.stderr)
+    return 0
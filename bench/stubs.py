@@ -0,0 +1,186 @@
+"""
+Local stand-ins for the Gemini SDK and the Tavily Search API, with configurable latency and error rates.
+"""
+import json
+import random
+import re
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import google.generativeai as genai
+
+from .synthetic import COMPANIES, SKILLS, TITLES, resume_pages
+
+# Error raised by the Gemini stub, shaped like the SDK's API errors (an integer `code`)
+class StubAPIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"{code} stubbed Gemini error")
+        self.code = code
+
+# Shared latency, error and call-count settings for a stub backend
+class StubBehavior:
+    def __init__(self, latency_ms=200.0, jitter_ms=50.0, error_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next_call(self):
+        """Count a call and return (latency_seconds, should_fail)."""
+        with self._lock:
+            self.calls += 1
+            latency = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+        return latency, fail
+
+    def stats(self):
+        return {"calls": self.calls, "errors": self.errors}
+
+# Function to produce a plausible answer for each kind of prompt the app sends
+def stub_answer(prompt, output_words=300):
+    if "Extract all text from this image" in prompt:
+        return "\n".join(resume_pages(1, seed=len(prompt))[0])
+    if "respond with 'OK'" in prompt:
+        return "OK"
+    if "Extract the top 15 most important keywords" in prompt:
+        return ", ".join(SKILLS[:15])
+    if "most relevant professional skills" in prompt:
+        return ", ".join(SKILLS[:10])
+    if "Extract the exact job title" in prompt:
+        return "Job Title: Data Engineer\nKey Requirements:\n1. Python\n2. SQL\n3. Airflow"
+    if "Extract a structured profile from this resume" in prompt:
+        return json.dumps({"name": "Jordan Example", "titles": TITLES[:2], "years_experience": 8,
+                           "skills": SKILLS[:12],
+                           "experience": [{"title": TITLES[0], "company": COMPANIES[0], "start": "2018",
+                                           "end": "2024", "highlights": ["Stubbed achievement."]}],
+                           "education": [{"degree": "BSc Computer Science", "institution": "Example University",
+                                          "year": "2016"}]})
+    if "screening one candidate for many openings" in prompt:
+        return "72%\nVerdict: Stubbed fit verdict.\nGaps: " + ", ".join(SKILLS[-3:])
+    if "Respond with only a JSON array" in prompt:
+        job_count = len(re.findall(r"^\s*Job \d+$", prompt, re.MULTILINE))
+        return json.dumps([{"job": i, "score": 50 + (i * 7) % 50, "matching_skills": SKILLS[:3],
+                            "commentary": "Stubbed fit commentary."} for i in range(1, job_count + 1)])
+    if "Relevance Score" in prompt:
+        return "1. Relevance Score: 72%\n2. Key Matching Skills: Python, SQL\n3. Potential Fit Commentary: Stubbed."
+    words = " ".join(SKILLS[i % len(SKILLS)] for i in range(output_words))
+    return f"78%\n\n{words}"
+
+# Stand-in for genai.GenerativeModel
+class StubGenerativeModel:
+    behavior = StubBehavior()
+    output_words = 300
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def _usage(self, contents, text):
+        prompt_tokens = sum(258 if isinstance(part, dict) else len(str(part)) // 4 + 1 for part in contents)
+        output_tokens = len(text) // 4 + 1
+        return types.SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+                                     total_token_count=prompt_tokens + output_tokens)
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        latency, fail = self.behavior.next_call()
+        time.sleep(latency)
+        if fail:
+            raise StubAPIError(429)
+        prompt = "\n".join(part for part in contents if isinstance(part, str))
+        text = stub_answer(prompt, self.output_words)
+        usage = self._usage(contents, text)
+        if not stream:
+            return types.SimpleNamespace(text=text, usage_metadata=usage)
+        chunks = [text[i:i + 200] for i in range(0, len(text), 200)]
+        return StubStream([types.SimpleNamespace(text=chunk) for chunk in chunks], usage)
+
+    def count_tokens(self, contents, **kwargs):
+        return types.SimpleNamespace(total_tokens=self._usage(contents, "").prompt_token_count)
+
+# Streamed stub response: iterating yields chunks, then usage_metadata is available
+class StubStream:
+    def __init__(self, chunks, usage_metadata):
+        self._chunks = chunks
+        self.usage_metadata = usage_metadata
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            # Spread a little generation time across the chunks
+            time.sleep(0.002)
+            yield chunk
+
+# Function to replace the Gemini SDK's model class with the stub, process-wide
+def install_gemini_stub(behavior, output_words=300):
+    StubGenerativeModel.behavior = behavior
+    StubGenerativeModel.output_words = output_words
+    genai.GenerativeModel = StubGenerativeModel
+    genai.configure(api_key="stub")
+
+# Local HTTP server answering POST /search like the Tavily Search API
+class StubTavilyServer:
+    def __init__(self, behavior, raw_content_words=600):
+        self.behavior = behavior
+        self.raw_content_words = raw_content_words
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                latency, fail = stub.behavior.next_call()
+                time.sleep(latency)
+                if fail:
+                    self._reply(503, {"detail": "stubbed Tavily error"})
+                    return
+                self._reply(200, stub.results(body.get("query", ""), int(body.get("max_results", 5))))
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def results(self, query, max_results):
+        words = " ".join(SKILLS[i % len(SKILLS)] for i in range(self.raw_content_words))
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Data Engineer #{i}",
+                    "url": f"https://jobs.example.com/{i}",
+                    "content": f"Stubbed listing {i} for {query}",
+                    "raw_content": f"Listing {i}. {words}",
+                    "score": 1.0 - i / 100,
+                }
+                for i in range(1, max_results + 1)
+            ],
+        }
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,139 @@
+"""
+Deterministic synthetic inputs: resume text, job descriptions and resume PDFs with or without a text layer.
+
+The PDFs are written by hand (no PDF library needed): text-layer PDFs use the
+standard Helvetica font, scanned PDFs embed one JPEG per page.
+"""
+import io
+import random
+
+from PIL import Image, ImageDraw
+
+SKILLS = [
+    "Python", "SQL", "Airflow", "Spark", "Kafka", "AWS", "Docker", "Kubernetes", "Terraform", "PostgreSQL",
+    "data modeling", "ETL pipelines", "machine learning", "pandas", "dbt", "Snowflake", "CI/CD", "REST APIs",
+    "Go", "Java", "React", "TypeScript", "GCP", "BigQuery", "Redis", "observability", "Linux", "Git",
+]
+TITLES = ["Data Engineer", "Backend Engineer", "Machine Learning Engineer", "Platform Engineer", "Software Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Analytics", "Hooli", "Stark Industries", "Wayne Data"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Maintained", "Scaled"]
+
+# US Letter at 72 points per inch
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+LINES_PER_PAGE = 48
+
+# Function to generate resume text with roughly the given number of pages
+def resume_pages(page_count, seed=0):
+    rng = random.Random(seed)
+    pages = []
+    for page_number in range(page_count):
+        lines = []
+        if page_number == 0:
+            lines += ["Jordan Example", "jordan@example.com | +1 555 0100 | Example City",
+                      "", "SUMMARY", f"{rng.choice(TITLES)} with {rng.randint(3, 15)} years of experience.", ""]
+        while len(lines) < LINES_PER_PAGE:
+            start = rng.randint(2005, 2022)
+            lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({start}-{start + rng.randint(1, 4)})")
+            for _ in range(rng.randint(3, 5)):
+                skills = ", ".join(rng.sample(SKILLS, 3))
+                lines.append(f"- {rng.choice(VERBS)} systems using {skills}, improving throughput "
+                             f"by {rng.randint(10, 80)}%")
+            lines.append("")
+        pages.append(lines[:LINES_PER_PAGE])
+    return pages
+
+# Function to generate a job description
+def job_description(seed=0):
+    rng = random.Random(seed)
+    title = rng.choice(TITLES)
+    required = rng.sample(SKILLS, 8)
+    lines = [f"Job Title: {title}", f"Company: {rng.choice(COMPANIES)}", "", "Responsibilities:"]
+    lines += [f"- {rng.choice(VERBS)} and operate services built on {skill}" for skill in required[:4]]
+    lines += ["", "Requirements:"]
+    lines += [f"- {rng.randint(2, 6)}+ years of experience with {skill}" for skill in required[4:]]
+    return "\n".join(lines)
+
+# Function to escape a string for a PDF literal
+def _pdf_string(text):
+    text = text.encode("latin-1", errors="replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+# Function to assemble PDF objects into a file with a valid cross-reference table
+def _write_pdf(objects):
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+def _stream(data, extra=""):
+    return f"<< /Length {len(data)}{extra} >>\nstream\n".encode() + data + b"\nendstream"
+
+# Function to build a born-digital PDF with a text layer
+def text_layer_pdf(pages):
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page
+    page_refs = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{page_refs}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        commands = ["BT", "/F1 10 Tf", "14 TL", f"50 {PAGE_HEIGHT - 50} Td"]
+        commands += [f"{_pdf_string(line)} Tj T*" for line in lines]
+        commands.append("ET")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(_stream("\n".join(commands).encode("latin-1", errors="replace")))
+    return _write_pdf(objects)
+
+# Function to render page text to a JPEG, as a scanner would produce it
+def render_page_jpeg(lines, dpi=150, quality=85):
+    scale = dpi / 72
+    img = Image.new("L", (int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)), 255)
+    draw = ImageDraw.Draw(img)
+    y = 50 * scale
+    for line in lines:
+        draw.text((50 * scale, y), line, fill=0)
+        y += 14 * scale
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+# Function to build an image-only PDF (no text layer) from JPEG pages
+def scanned_pdf(page_jpegs):
+    # Objects: 1 catalog, 2 page tree, then a (page, content, image) triple per page
+    page_refs = " ".join(f"{3 + 3 * i} 0 R" for i in range(len(page_jpegs)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{page_refs}] /Count {len(page_jpegs)} >>".encode(),
+    ]
+    for i, jpeg in enumerate(page_jpegs):
+        with Image.open(io.BytesIO(jpeg)) as img:
+            width, height = img.size
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                       f"/Resources << /XObject << /Im0 {5 + 3 * i} 0 R >> >> /Contents {4 + 3 * i} 0 R >>".encode())
+        objects.append(_stream(f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im0 Do Q".encode()))
+        objects.append(_stream(jpeg, f" /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                                     "/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /DCTDecode"))
+    return _write_pdf(objects)
+
+# Function to build a synthetic resume of the given kind ("text" or "scanned")
+def synthetic_resume(page_count, kind, seed=0):
+    """
+    Returns:
+        dict: 'pdf' bytes, 'pages' (one JPEG per page, as the rasterizer would
+        produce) and 'text' (the ground-truth resume text)
+    """
+    pages = resume_pages(page_count, seed)
+    page_jpegs = [render_page_jpeg(lines) for lines in pages]
+    pdf = text_layer_pdf(pages) if kind == "text" else scanned_pdf(page_jpegs)
+    return {"pdf": pdf, "pages": page_jpegs, "text": "\n".join("\n".join(lines) for lines in pages)}
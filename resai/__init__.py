@@ -0,0 +1,82 @@
+"""
+ResAi core: resume processing, prompts and Gemini calls, usable without the Streamlit app.
+"""
+from .config import configure_gemini
+from .gemini import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, GeminiClient, ModelRouter, get_gemini_client
+from .highlight import extract_keywords, highlight_keywords, highlight_text
+from .llm import (
+    generate_content_cached,
+    generate_content_streamed,
+    generate_feature_response,
+    parse_json_response,
+    parse_percentage,
+)
+from .jobs import JobCancelled, JobRunner, check_cancelled, get_job_runner, job_key, report_partial, report_progress
+from .metrics import finish_run, stage, start_run
+from .pdf import extract_text_from_pdf, input_pdf_setup, process_pdf
+from .pipeline import run_batch, score_pair
+from .profile import extract_profile, get_resume_profile, profile_summary
+from .prompts import FEATURE_PROMPTS, cover_letter_prompt
+from .ranking import load_job_descriptions, rank_job_descriptions
+from .report import REPORT_SECTIONS, build_report_document, iter_report_sections, run_report
+from .scoring import local_match_score
+from .search import (
+    TavilyClient,
+    TavilyError,
+    extract_passages,
+    format_job_results,
+    score_job_relevance,
+    search_jobs,
+    tavily_job_search,
+)
+
+__all__ = [
+    "FEATURE_PROMPTS",
+    "GeminiClient",
+    "JobCancelled",
+    "JobRunner",
+    "ModelRouter",
+    "PRIORITY_BACKGROUND",
+    "PRIORITY_INTERACTIVE",
+    "REPORT_SECTIONS",
+    "TavilyClient",
+    "TavilyError",
+    "build_report_document",
+    "check_cancelled",
+    "configure_gemini",
+    "cover_letter_prompt",
+    "extract_keywords",
+    "extract_passages",
+    "extract_profile",
+    "extract_text_from_pdf",
+    "finish_run",
+    "format_job_results",
+    "generate_content_cached",
+    "generate_content_streamed",
+    "generate_feature_response",
+    "get_gemini_client",
+    "get_job_runner",
+    "get_resume_profile",
+    "highlight_keywords",
+    "highlight_text",
+    "input_pdf_setup",
+    "iter_report_sections",
+    "job_key",
+    "load_job_descriptions",
+    "local_match_score",
+    "parse_json_response",
+    "parse_percentage",
+    "process_pdf",
+    "profile_summary",
+    "rank_job_descriptions",
+    "report_partial",
+    "report_progress",
+    "run_batch",
+    "run_report",
+    "score_job_relevance",
+    "score_pair",
+    "search_jobs",
+    "stage",
+    "start_run",
+    "tavily_job_search",
+]
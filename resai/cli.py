@@ -0,0 +1,85 @@
+"""
+Command line interface for headless ResAi batch runs.
+
+    python -m resai batch --resumes resumes/ --jobs jobs/ --output results.jsonl
+"""
+import argparse
+import sys
+
+from .config import BATCH_LLM_WORKERS, BATCH_PDF_WORKERS
+from .pipeline import JOB_EXTENSIONS, RESUME_EXTENSIONS, list_files, run_batch
+from .prompts import FEATURE_PROMPTS
+
+# Function to parse a comma-separated feature list
+def parse_features(value):
+    features = tuple(f.strip() for f in value.split(",") if f.strip())
+    unknown = [f for f in features if f not in FEATURE_PROMPTS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown feature(s) {', '.join(unknown)}; choose from {', '.join(FEATURE_PROMPTS)}"
+        )
+    return features
+
+# Function to build the argument parser
+def build_parser():
+    parser = argparse.ArgumentParser(prog="resai", description="ResAi headless tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Score every resume against every job description")
+    batch.add_argument("--resumes", required=True, help="Directory of resume PDFs")
+    batch.add_argument("--jobs", required=True, help="Directory of job descriptions (.txt or .md)")
+    batch.add_argument("--output", default="results.jsonl", help="JSONL results file (default: results.jsonl)")
+    batch.add_argument("--features", type=parse_features, default=("analysis",),
+                       help=f"Comma-separated feature prompts to run per pair: {', '.join(FEATURE_PROMPTS)} "
+                            "(default: analysis)")
+    batch.add_argument("--local-only", action="store_true",
+                       help="Only compute the local match score, without any Gemini feature call")
+    batch.add_argument("--pdf-workers", type=int, default=BATCH_PDF_WORKERS,
+                       help=f"Resumes processed concurrently (default: {BATCH_PDF_WORKERS})")
+    batch.add_argument("--llm-workers", type=int, default=BATCH_LLM_WORKERS,
+                       help=f"Pairs scored concurrently (default: {BATCH_LLM_WORKERS})")
+    batch.add_argument("--fresh", action="store_true", help="Bypass the Gemini response cache")
+    batch.add_argument("--restart", action="store_true",
+                       help="Overwrite the output file instead of skipping completed pairs")
+    return parser
+
+# Function to run the batch command
+def run_batch_command(args):
+    resume_paths = list_files(args.resumes, RESUME_EXTENSIONS)
+    job_paths = list_files(args.jobs, JOB_EXTENSIONS)
+    if not resume_paths or not job_paths:
+        print(f"Found {len(resume_paths)} resume(s) and {len(job_paths)} job description(s); nothing to do.",
+              file=sys.stderr)
+        return 1
+
+    total = len(resume_paths) * len(job_paths)
+    finished = 0
+
+    def report(record):
+        nonlocal finished
+        finished += 1
+        detail = f"local {record['local_score']}%" if record["status"] == "ok" else record["error"]
+        print(f"[{finished}] {record['status']} {record['resume']} x {record['job']} "
+              f"({record['seconds']:.1f}s): {detail}", file=sys.stderr)
+
+    counts = run_batch(
+        resume_paths,
+        job_paths,
+        args.output,
+        features=() if args.local_only else args.features,
+        pdf_workers=args.pdf_workers,
+        llm_workers=args.llm_workers,
+        use_cache=not args.fresh,
+        resume=not args.restart,
+        on_record=report
+    )
+    print(f"{total} pair(s): {counts['ok']} ok, {counts['error']} failed, {counts['skipped']} already done",
+          file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+# Entry point for `python -m resai`
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "batch":
+        return run_batch_command(args)
+    return 2
@@ -0,0 +1,106 @@
+"""
+Settings for the ResAi core, read once from the environment (a .env file is loaded first).
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Function to read a comma-separated list setting
+def env_list(name, default=""):
+    return tuple(item.strip() for item in os.getenv(name, default).split(",") if item.strip())
+
+# Resume cache settings (processed pages + OCR text, keyed by upload hash)
+RESUME_CACHE_DIR = os.getenv("RESAI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "resai"))
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESAI_RESUME_CACHE_MAX_MB", "500")) * 1024 * 1024
+RASTER_SETTINGS = {
+    "fmt": "jpeg",
+    "dpi": int(os.getenv("RESAI_RASTER_DPI", "200")),
+    "grayscale": os.getenv("RESAI_RASTER_GRAYSCALE", "false").lower() == "true",
+    "jpeg_quality": int(os.getenv("RESAI_JPEG_QUALITY", "85")),
+    "max_pages": int(os.getenv("RESAI_MAX_PAGES", "10")),
+}
+RASTER_THREADS = int(os.getenv("RESAI_RASTER_THREADS", "2"))
+OCR_PROMPT = "Extract all text from this image, preserve formatting as much as possible."
+OCR_MAX_WORKERS = int(os.getenv("RESAI_OCR_WORKERS", "4"))
+OCR_RETRIES = int(os.getenv("RESAI_OCR_RETRIES", "2"))
+TEXT_LAYER_MIN_CHARS = int(os.getenv("RESAI_TEXT_LAYER_MIN_CHARS", "50"))
+
+# LLM response cache settings (shared by every feature)
+LLM_CACHE_PATH = os.path.join(RESUME_CACHE_DIR, "llm_responses.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("RESAI_LLM_CACHE_TTL_HOURS", "168")) * 3600
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("RESAI_LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Shared Gemini client limits (per process, across all sessions)
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("RESAI_GEMINI_RPM", "60"))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("RESAI_GEMINI_TPM", "1000000"))
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("RESAI_GEMINI_MAX_IN_FLIGHT", "8"))
+GEMINI_RETRIES = int(os.getenv("RESAI_GEMINI_RETRIES", "4"))
+# Count tokens with count_tokens when a response carries no usage_metadata (google-generativeai < 0.5)
+GEMINI_COUNT_USAGE = os.getenv("RESAI_GEMINI_COUNT_USAGE", "true").lower() == "true"
+
+# Model routing: each task type tries its models in order; a model that hits its quota is skipped for the cooldown
+MODEL_ROUTES = {
+    "ocr": env_list("RESAI_MODELS_OCR", "gemini-1.5-flash,gemini-1.5-flash-8b"),
+    "extract": env_list("RESAI_MODELS_EXTRACT", "gemini-1.5-flash-8b,gemini-1.5-flash"),
+    "score": env_list("RESAI_MODELS_SCORE", "gemini-1.5-flash,gemini-1.5-flash-8b"),
+    "generate": env_list("RESAI_MODELS_GENERATE", "gemini-1.5-flash,gemini-1.5-flash-8b"),
+}
+# Per-model limits as "model=requests/tokens" per minute; other models use the limits above
+MODEL_LIMITS = {
+    model.strip(): (int(limits.partition("/")[0]), int(limits.partition("/")[2] or GEMINI_TOKENS_PER_MINUTE))
+    for model, _, limits in (entry.partition("=") for entry in env_list("RESAI_MODEL_LIMITS"))
+}
+MODEL_COOLDOWN = float(os.getenv("RESAI_MODEL_COOLDOWN_SECONDS", "60"))
+MODEL_STATUS_TTL = float(os.getenv("RESAI_MODEL_STATUS_TTL_SECONDS", "60"))
+
+# Feature request payload settings ("auto" prefers extracted text over page images)
+PAYLOAD_MODE = os.getenv("RESAI_PAYLOAD_MODE", "auto")
+PAYLOAD_TOKEN_BUDGET = int(os.getenv("RESAI_PAYLOAD_TOKEN_BUDGET", "8000"))
+PAYLOAD_IMAGE_MAX_SIDE = int(os.getenv("RESAI_PAYLOAD_IMAGE_MAX_SIDE", "1600"))
+PAYLOAD_IMAGE_MAX_BYTES = int(os.getenv("RESAI_PAYLOAD_IMAGE_MAX_KB", "300")) * 1024
+
+# Job search relevance scoring settings ("concurrent" or "batch")
+RELEVANCE_MODE = os.getenv("RESAI_RELEVANCE_MODE", "concurrent")
+RELEVANCE_MAX_WORKERS = int(os.getenv("RESAI_RELEVANCE_WORKERS", "5"))
+
+# Job search result settings (passages kept per page, results sent to relevance scoring)
+SEARCH_SNIPPET_CHARS = int(os.getenv("RESAI_SEARCH_SNIPPET_CHARS", "1200"))
+SEARCH_PASSAGE_CHARS = int(os.getenv("RESAI_SEARCH_PASSAGE_CHARS", "300"))
+SEARCH_RELEVANCE_TOP_K = int(os.getenv("RESAI_SEARCH_RELEVANCE_TOP_K", "3"))
+
+# Tavily client settings (TAVILY_API_URL can point at a local stub server)
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com")
+TAVILY_CONNECT_TIMEOUT = float(os.getenv("RESAI_TAVILY_CONNECT_TIMEOUT", "5"))
+TAVILY_READ_TIMEOUT = float(os.getenv("RESAI_TAVILY_READ_TIMEOUT", "30"))
+TAVILY_RETRIES = int(os.getenv("RESAI_TAVILY_RETRIES", "3"))
+TAVILY_CACHE_TTL = float(os.getenv("RESAI_TAVILY_CACHE_TTL_MINUTES", "60")) * 60
+TAVILY_CACHE_MAX_ENTRIES = int(os.getenv("RESAI_TAVILY_CACHE_MAX_ENTRIES", "256"))
+TAVILY_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Metrics export (empty paths disable the export)
+METRICS_JSONL_PATH = os.getenv("RESAI_METRICS_JSONL", "")
+METRICS_PROMETHEUS_PATH = os.getenv("RESAI_METRICS_PROMETHEUS", "")
+
+# Full report settings (feature prompts run concurrently per report)
+REPORT_MAX_WORKERS = int(os.getenv("RESAI_REPORT_WORKERS", "3"))
+
+# Multi-job-description ranking settings (separator lines split pasted job descriptions)
+RANK_TOP_K = int(os.getenv("RESAI_RANK_TOP_K", "5"))
+RANK_MAX_WORKERS = int(os.getenv("RESAI_RANK_WORKERS", "4"))
+RANK_SEPARATOR = os.getenv("RESAI_RANK_SEPARATOR", "---")
+
+# Background job settings (shared by every session in the process)
+JOB_WORKERS = int(os.getenv("RESAI_JOB_WORKERS", "8"))
+JOB_RETENTION = float(os.getenv("RESAI_JOB_RETENTION_MINUTES", "10")) * 60
+
+# Batch pipeline settings
+BATCH_PDF_WORKERS = int(os.getenv("RESAI_BATCH_PDF_WORKERS", "2"))
+BATCH_LLM_WORKERS = int(os.getenv("RESAI_BATCH_LLM_WORKERS", "4"))
+
+# Function to configure the Gemini API key
+def configure_gemini(api_key=None):
+    # Imported here: the SDK is slow to import and only needed once a call is made
+    import google.generativeai as genai
+    genai.configure(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
@@ -0,0 +1,388 @@
+"""
+Process-wide Gemini client: per-task model routing with quota fallback, per-model request/token rate limits,
+an in-flight cap with priorities, and retries.
+"""
+import functools
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import (
+    GEMINI_COUNT_USAGE,
+    GEMINI_MAX_IN_FLIGHT,
+    GEMINI_REQUESTS_PER_MINUTE,
+    GEMINI_RETRIES,
+    GEMINI_TOKENS_PER_MINUTE,
+    MODEL_COOLDOWN,
+    MODEL_LIMITS,
+    MODEL_ROUTES,
+    MODEL_STATUS_TTL,
+    configure_gemini,
+)
+from .metrics import in_current_context, payload_bytes, record_usage, stage
+
+# Call priorities: lower values are admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Approximate token cost of one image part and of one character of text
+IMAGE_PART_TOKENS = 258
+CHARS_PER_TOKEN = 4
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+PROBE_PROMPT = "Hello, please respond with 'OK' if you can receive this message."
+
+# Function to estimate the input tokens of a request without calling count_tokens
+def estimate_tokens(contents):
+    tokens = 0
+    for part in contents:
+        if isinstance(part, dict):
+            tokens += IMAGE_PART_TOKENS
+        else:
+            tokens += len(str(part)) // CHARS_PER_TOKEN + 1
+    return tokens
+
+# Function to read the text of a finished response ("" when it was blocked or has no candidates)
+def response_text(response):
+    try:
+        return response.text
+    except (AttributeError, ValueError):
+        return ""
+
+# Function to decide whether a Gemini error is worth retrying (rate limits and server errors)
+def is_retryable(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    error_msg = str(error).lower()
+    return any(marker in error_msg for marker in ("429", "quota", "rate limit", "503", "500", "unavailable"))
+
+# Function to decide whether a Gemini error means the model's quota is used up, so another model should be tried
+def is_quota_error(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code == 429
+    error_msg = str(error).lower()
+    return any(marker in error_msg for marker in ("429", "quota", "rate limit", "resource exhausted"))
+
+# Token bucket refilled continuously at a per-minute rate
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (amounts above capacity wait for a full bucket)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        # Correct an estimate once the real usage is known; the level may go negative
+        self._refill()
+        self.level -= amount
+
+# Function to get the first-choice model of a task type (a model name routes to itself)
+def primary_model(task, routes=MODEL_ROUTES):
+    return (routes.get(task) or (task,))[0]
+
+# Task type to model routing, skipping models that recently ran out of quota
+class ModelRouter:
+    """
+    Maps task types ("ocr", "extract", "score", "generate") to ordered model
+    lists. A model that answers with a quota error is put on cooldown and the
+    next model of the route is used until the cooldown ends. Any name that is
+    not a task type routes to that model alone.
+    """
+
+    def __init__(self, routes=MODEL_ROUTES, cooldown=MODEL_COOLDOWN):
+        self.routes = {task: tuple(models) for task, models in routes.items() if models}
+        self.cooldown = cooldown
+        self._limited_until = {}
+        self._lock = threading.Lock()
+
+    def models(self, task):
+        return self.routes.get(task, (task,))
+
+    def all_models(self):
+        return list(dict.fromkeys(model for models in self.routes.values() for model in models))
+
+    def pick(self, task):
+        """Return the first model of the route not on cooldown, or the one whose cooldown ends first."""
+        models = self.models(task)
+        now = time.monotonic()
+        with self._lock:
+            for model in models:
+                if self._limited_until.get(model, 0) <= now:
+                    return model
+            return min(models, key=lambda model: self._limited_until[model])
+
+    def fall_back(self, task, model):
+        """Put model on cooldown; returns whether the route still has a model that is not on cooldown."""
+        now = time.monotonic()
+        with self._lock:
+            self._limited_until[model] = now + self.cooldown
+            return any(self._limited_until.get(other, 0) <= now for other in self.models(task))
+
+# Shared Gemini client with model routing, rate limiting, an in-flight cap and retries
+class GeminiClient:
+    """
+    One client per process, shared by every session and feature.
+
+    Each call names a task type, routed to a model by the ModelRouter, or a
+    model directly. Calls are admitted by priority (then arrival order) once
+    a slot under the in-flight cap is free and both the requests/min and
+    tokens/min buckets of their model have capacity; a call only waits
+    behind earlier calls whose model could be admitted. A quota error moves
+    the call to the route's next model at once; rate-limit and server errors
+    are otherwise retried with exponential backoff and full jitter.
+    """
+
+    def __init__(self, requests_per_minute=GEMINI_REQUESTS_PER_MINUTE, tokens_per_minute=GEMINI_TOKENS_PER_MINUTE,
+                 max_in_flight=GEMINI_MAX_IN_FLIGHT, retries=GEMINI_RETRIES, model_limits=MODEL_LIMITS,
+                 router=None, count_usage=GEMINI_COUNT_USAGE):
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.count_usage = count_usage
+        self.router = router or ModelRouter()
+        self._default_limits = (requests_per_minute, tokens_per_minute)
+        self._model_limits = dict(model_limits)
+        self._buckets = {}
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._counter = itertools.count()
+        self._in_flight = 0
+        self._models = {}
+        self._status = None
+
+    def model(self, model_name):
+        import google.generativeai as genai
+
+        with self._cond:
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def _model_buckets(self, model_name):
+        # Called with the condition held
+        if model_name not in self._buckets:
+            requests_per_minute, tokens_per_minute = self._model_limits.get(model_name, self._default_limits)
+            self._buckets[model_name] = (TokenBucket(requests_per_minute), TokenBucket(tokens_per_minute))
+        return self._buckets[model_name]
+
+    def _wait_time(self, model_name, tokens):
+        requests, token_bucket = self._model_buckets(model_name)
+        return max(requests.wait_time(1), token_bucket.wait_time(tokens))
+
+    def _acquire(self, priority, tokens, model_name):
+        ticket = (priority, next(self._counter), model_name, tokens)
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    # Earlier calls for the same model keep their order; calls for other models only
+                    # hold this one back while their own model could be admitted
+                    blocked = any(
+                        other < ticket and (other[2] == model_name or self._wait_time(other[2], other[3]) <= 0)
+                        for other in self._waiting
+                    )
+                    if not blocked and self._in_flight < self.max_in_flight:
+                        wait = self._wait_time(model_name, tokens)
+                        if wait <= 0:
+                            self._waiting.remove(ticket)
+                            heapq.heapify(self._waiting)
+                            requests, token_bucket = self._model_buckets(model_name)
+                            requests.take(1)
+                            token_bucket.take(tokens)
+                            self._in_flight += 1
+                            self._cond.notify_all()
+                            return
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait(1.0)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _record_usage(self, record, model_name, contents, estimated_tokens, response, text):
+        # The tokens/min bucket was charged the input estimate; correct it to the input and output actually used
+        prompt_tokens, output_tokens, source = self._usage(model_name, contents, response, text)
+        record_usage(record, prompt_tokens, output_tokens, source)
+        with self._cond:
+            self._model_buckets(model_name)[1].adjust(prompt_tokens + output_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def _usage(self, model_name, contents, response, text):
+        """
+        Return (prompt_tokens, output_tokens, source) for a finished call.
+
+        google-generativeai 0.3.1 (the pinned SDK) returns no usage_metadata, so
+        the tokens are then counted with count_tokens, which has its own quota;
+        if counting is disabled or fails they are estimated locally.
+        """
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and getattr(usage, "total_token_count", 0):
+            return usage.prompt_token_count, usage.candidates_token_count, "usage_metadata"
+        if self.count_usage:
+            try:
+                with stage("count_usage", model=model_name):
+                    model = self.model(model_name)
+                    return (model.count_tokens(contents).total_tokens,
+                            model.count_tokens([text]).total_tokens if text else 0, "count_tokens")
+            except Exception as e:
+                print(f"count_tokens failed, using an estimate: {e}")
+        return estimate_tokens(contents), estimate_tokens([text]) if text else 0, "estimate"
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(60.0, 2 ** attempt))
+
+    def generate_content(self, model_name, contents, priority=PRIORITY_INTERACTIVE, retries=None, route=None):
+        """
+        Call generate_content under the shared limits and return the response.
+
+        Args:
+            model_name (str): Task type ("ocr", "extract", "score", "generate") or Gemini model to call
+            contents (list): Request parts
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+            retries (int): Override the client's retry count for this call; moving
+                to another model after a quota error does not count as a retry
+            route (dict): If given, its 'model' is set to the model that answered
+        """
+        retries = self.retries if retries is None else retries
+        estimated_tokens = estimate_tokens(contents)
+        request_bytes = payload_bytes(contents)
+        attempt = 0
+        while True:
+            model = self.router.pick(model_name)
+            self._acquire(priority, estimated_tokens, model)
+            response = None
+            try:
+                with stage("gemini", task=model_name, model=model, attempt=attempt, bytes=request_bytes) as record:
+                    response = self.model(model).generate_content(contents)
+                if route is not None:
+                    route["model"] = model
+            except Exception as e:
+                if is_quota_error(e) and self.router.fall_back(model_name, model):
+                    continue
+                if attempt == retries or not is_retryable(e):
+                    raise
+            finally:
+                self._release()
+            if response is not None:
+                # Counted outside the stage and the in-flight slot, so a count_tokens fallback adds neither
+                self._record_usage(record, model, contents, estimated_tokens, response, response_text(response))
+                return response
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def count_tokens(self, model_name, contents):
+        # count_tokens has its own quota, so it bypasses the generation limits
+        return self.model(self.router.pick(model_name)).count_tokens(contents).total_tokens
+
+    def stream_content(self, model_name, contents, priority=PRIORITY_INTERACTIVE, retries=None, route=None):
+        """
+        Stream a response, yielding the text of each chunk.
+
+        The in-flight slot is held until the stream is exhausted or closed.
+        Failures are only retried before the first chunk has been yielded.
+        If route is given, its 'model' is set to the model that answered.
+        """
+        retries = self.retries if retries is None else retries
+        estimated_tokens = estimate_tokens(contents)
+        request_bytes = payload_bytes(contents)
+        attempt = 0
+        while True:
+            model = self.router.pick(model_name)
+            self._acquire(priority, estimated_tokens, model)
+            response = None
+            started = False
+            finished = False
+            texts = []
+            try:
+                # The stage spans the whole stream, including time spent by the consumer between chunks
+                with stage("gemini_stream", task=model_name, model=model, attempt=attempt,
+                           bytes=request_bytes) as record:
+                    response = self.model(model).generate_content(contents, stream=True)
+                    if route is not None:
+                        route["model"] = model
+                    for chunk in response:
+                        started = True
+                        texts.append(chunk.text)
+                        yield texts[-1]
+                finished = True
+            except Exception as e:
+                if started:
+                    raise
+                if is_quota_error(e) and self.router.fall_back(model_name, model):
+                    continue
+                if attempt == retries or not is_retryable(e):
+                    raise
+            finally:
+                self._release()
+            if finished:
+                self._record_usage(record, model, contents, estimated_tokens, response, "".join(texts))
+                return
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def probe_model(self, model_name):
+        """Send a one-line prompt to one model, without retries or fallback; returns a status dict."""
+        start = time.perf_counter()
+        try:
+            response = self.generate_content(model_name, [PROBE_PROMPT], retries=0)
+            status, detail = ("available", "") if "ok" in response.text.lower() else ("unexpected", response.text[:50])
+        except Exception as e:
+            status, detail = ("rate_limited" if is_quota_error(e) else "error"), str(e)[:200]
+        return {"model": model_name, "status": status, "detail": detail, "seconds": time.perf_counter() - start}
+
+    def model_status(self, models=None, ttl=MODEL_STATUS_TTL):
+        """
+        Probe every configured model (or the given ones) concurrently.
+
+        Results are reused for ttl seconds, so repeated checks from any session
+        do not spend quota.
+
+        Returns:
+            tuple: (checked_at, list of status dicts from probe_model, in model order)
+        """
+        models = list(models or self.router.all_models())
+        with self._cond:
+            cached = self._status
+        if cached is not None and cached[1] == models and time.time() - cached[0] < ttl:
+            return cached[0], cached[2]
+        with ThreadPoolExecutor(max_workers=max(1, len(models))) as executor:
+            results = list(executor.map(in_current_context(self.probe_model), models))
+        checked_at = time.time()
+        with self._cond:
+            self._status = (checked_at, models, results)
+        return checked_at, results
+
+# Function to get the process-wide Gemini client, configuring the API key on first use
+@functools.lru_cache(maxsize=None)
+def get_gemini_client():
+    configure_gemini()
+    return GeminiClient()
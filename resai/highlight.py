@@ -0,0 +1,85 @@
+"""
+Job description keyword extraction and single-pass resume keyword highlighting.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .config import LLM_CACHE_TTL
+from .llm import generate_content_cached
+
+# Extracted keywords by job description hash, kept as long as the response cache keeps the answer
+KEYWORD_MEMO_MAX_ENTRIES = 256
+_keyword_memo = OrderedDict()
+_keyword_memo_lock = threading.Lock()
+
+# Function to extract the most important keywords from a job description
+def extract_keywords(job_desc, use_cache=True):
+    prompt = f"""
+    Extract the top 15 most important keywords from this job description, and return them as a comma-separated list:
+    
+    {job_desc}
+    """
+    response_text = generate_content_cached("extract", [prompt], use_cache)
+    keywords = []
+    seen = set()
+    for kw in response_text.split(','):
+        kw = kw.strip().strip('*').strip()
+        if kw and kw.lower() not in seen:
+            seen.add(kw.lower())
+            keywords.append(kw)
+    return keywords
+
+# Function to memoize keyword extraction process-wide per job description hash
+def cached_keywords(job_desc, use_cache=True, ttl=LLM_CACHE_TTL):
+    """
+    Entries expire after the response cache TTL; a fresh generation (use_cache
+    False) skips the memo and replaces its entry with the new answer.
+    """
+    key = hashlib.sha256(job_desc.encode()).hexdigest()
+    if use_cache:
+        with _keyword_memo_lock:
+            entry = _keyword_memo.get(key)
+            if entry is not None and time.time() - entry[0] <= ttl:
+                _keyword_memo.move_to_end(key)
+                return list(entry[1])
+    keywords = extract_keywords(job_desc, use_cache)
+    with _keyword_memo_lock:
+        _keyword_memo[key] = (time.time(), keywords)
+        _keyword_memo.move_to_end(key)
+        while len(_keyword_memo) > KEYWORD_MEMO_MAX_ENTRIES:
+            _keyword_memo.popitem(last=False)
+    return list(keywords)
+
+# Function to wrap every keyword occurrence in bold in a single pass
+def highlight_text(text, keywords):
+    """
+    Highlight keywords with one compiled alternation instead of one pass per keyword.
+
+    Longer keywords are tried first, so overlapping keywords resolve to the
+    longest match, and already-highlighted text is never re-matched. Matches
+    must not sit inside a larger word or symbol-suffixed token (so "C" never
+    matches in "C#" or "C++"), and keep the resume's original casing.
+    """
+    if not keywords:
+        return text
+    alternation = "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+    pattern = re.compile(rf"(?<!\w)(?:{alternation})(?![\w+#])", re.IGNORECASE)
+    return pattern.sub(lambda match: f"**{match.group(0)}**", text)
+
+# Function to find the profile skills that the job description also mentions, without a model call
+def profile_keywords(profile, job_desc):
+    return [skill for skill in profile.get("skills", [])
+            if re.search(rf"(?<!\w){re.escape(skill)}(?![\w+#])", job_desc, re.IGNORECASE)]
+
+# Function to highlight keywords in the resume text
+def highlight_keywords(resume_text, job_desc, use_cache=True, profile=None):
+    keywords = cached_keywords(job_desc, use_cache)
+    if profile is not None:
+        # The candidate's own skills that the job asks for, as named in the resume
+        seen = {kw.lower() for kw in keywords}
+        keywords = keywords + [skill for skill in profile_keywords(profile, job_desc) if skill.lower() not in seen]
+    highlighted_text = highlight_text(resume_text, keywords)
+    return highlighted_text, keywords
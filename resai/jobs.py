@@ -0,0 +1,208 @@
+"""
+Background jobs: a process-wide runner with job IDs, progress, cancellation and single-flight deduplication.
+"""
+import contextvars
+import functools
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import JOB_RETENTION, JOB_WORKERS
+from .metrics import start_run
+
+CURRENT_JOB = contextvars.ContextVar("resai_current_job", default=None)
+
+# Error raised inside a job once it has been cancelled
+class JobCancelled(Exception):
+    pass
+
+# One background execution, shared by every caller that submitted the same operation and inputs
+class Job:
+    def __init__(self, operation, key):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.key = key
+        self.status = "pending"
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished_at = None
+        self.owners = set()
+        self.run = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or the timeout expires; returns whether it finished."""
+        return self._finished.wait(timeout)
+
+    def update(self, done=None, total=None, message=None):
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+    def fraction(self):
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+    def stages(self):
+        """Stages recorded by the job so far (see resai.metrics), for merging into a caller's run."""
+        return self.run.summary()["stages"] if self.run is not None else []
+
+def _digest_update(digest, value):
+    if isinstance(value, bytes):
+        digest.update(b"b%d:" % len(value))
+        digest.update(value)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"l%d:" % len(value))
+        for item in value:
+            _digest_update(digest, item)
+    elif isinstance(value, dict):
+        digest.update(b"d%d:" % len(value))
+        for item_key in sorted(value, key=repr):
+            _digest_update(digest, item_key)
+            _digest_update(digest, value[item_key])
+    else:
+        text = repr(value).encode()
+        digest.update(b"r%d:" % len(text))
+        digest.update(text)
+
+# Function to build a single-flight key from an operation name and its inputs
+def job_key(operation, *inputs):
+    """Hash the operation and its inputs; bytes (e.g. PDF pages) are hashed directly, nested in lists or dicts."""
+    digest = hashlib.sha256(operation.encode())
+    _digest_update(digest, inputs)
+    return digest.hexdigest()
+
+# Process-wide runner for background jobs
+class JobRunner:
+    """
+    Runs jobs on a bounded thread pool, shared by every Streamlit session.
+
+    Submitting an operation whose key matches a job that is still in flight
+    attaches to that job instead of starting a second execution. Each caller
+    attaches as an owner; cancelling removes the owner, and the job itself is
+    cancelled once no owner is left. Finished jobs are kept for `retention`
+    seconds so callers can pick up their results after a rerun.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, retention=JOB_RETENTION):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="resai-job")
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, operation, key, fn, *args, owner=None, **kwargs):
+        """
+        Start fn(*args, **kwargs) in the background, or attach to the identical job already running.
+
+        Args:
+            operation (str): Operation name, for display
+            key (str): Single-flight key, see job_key
+            fn (callable): Work to run; it may call report_progress, report_partial and check_cancelled
+            owner (str): Caller identity (e.g. a session ID) used for cancellation
+
+        Returns:
+            Job: The new or shared job
+        """
+        with self._lock:
+            self._prune()
+            job = self._in_flight.get(key)
+            if job is None:
+                job = Job(operation, key)
+                self._jobs[job.id] = job
+                self._in_flight[key] = job
+                # Jobs start from an empty context instead of inheriting the submitter's run or job
+                self._executor.submit(contextvars.Context().run, self._run, job, fn, args, kwargs)
+            if owner is not None:
+                job.owners.add(owner)
+            return job
+
+    def _run(self, job, fn, args, kwargs):
+        CURRENT_JOB.set(job)
+        # The job's stages are collected on its own run; callers merge them into theirs (see Job.stages)
+        job.run = start_run(f"job:{job.operation}")
+        try:
+            check_cancelled()
+            job.status = "running"
+            result = fn(*args, **kwargs)
+            # Work that cannot be interrupted still never delivers a result after a cancel
+            check_cancelled()
+            job.result = result
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+            job.finished_at = time.time()
+            job._finished.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id, owner=None):
+        """Detach owner (or everyone, if None) from a job, cancelling it once nobody is left."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            if owner is not None:
+                job.owners.discard(owner)
+            if owner is None or not job.owners:
+                job._cancel.set()
+                # New submissions with the same inputs start fresh instead of attaching to a dying job
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+# Function to get the process-wide job runner
+@functools.lru_cache(maxsize=None)
+def get_job_runner():
+    return JobRunner()
+
+# Function to report progress from inside a job (a no-op outside of one)
+def report_progress(done=None, total=None, message=None):
+    job = CURRENT_JOB.get()
+    if job is not None:
+        job.update(done, total, message)
+
+# Function to publish a partial result (e.g. streamed text) from inside a job; also a cancellation point
+def report_partial(value):
+    job = CURRENT_JOB.get()
+    if job is not None:
+        job.partial = value
+    check_cancelled()
+
+# Function to stop the current job if it has been cancelled
+def check_cancelled():
+    job = CURRENT_JOB.get()
+    if job is not None and job.cancel_requested:
+        raise JobCancelled(f"Job {job.id} was cancelled")
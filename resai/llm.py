@@ -0,0 +1,192 @@
+"""
+Gemini calls for ResAi, with a persistent SQLite response cache shared by every feature.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+from .config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH, LLM_CACHE_TTL
+from .gemini import PRIORITY_INTERACTIVE, get_gemini_client, primary_model
+from .payload import build_feature_payload
+
+# Function to compute the response cache key for a Gemini request
+def llm_cache_key(model_name, contents):
+    """
+    Hash the model name and every request part. Text parts (prompt, job
+    description) are hashed as text; image parts (resume pages) by their bytes.
+    """
+    digest = hashlib.sha256(model_name.encode())
+    for part in contents:
+        if isinstance(part, dict):
+            digest.update(b"\0blob:" + part["mime_type"].encode() + b":")
+            digest.update(hashlib.sha256(part["data"]).digest())
+        else:
+            digest.update(b"\0text:")
+            digest.update(str(part).encode())
+    return digest.hexdigest()
+
+# Function to open the response cache database
+def llm_cache_connect(path=LLM_CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_responses (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    """)
+    return conn
+
+# Function to look up a cached Gemini response
+def llm_cache_get(key, ttl=LLM_CACHE_TTL):
+    try:
+        conn = llm_cache_connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT response, created FROM llm_responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if time.time() - row[1] > ttl:
+                    conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                return row[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Response cache read skipped: {e}")
+        return None
+
+# Function to store a Gemini response, evicting expired and least-recently-used entries
+def llm_cache_put(key, model_name, response_text, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+    now = time.time()
+    try:
+        conn = llm_cache_connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, response_text, now, now)
+                )
+                conn.execute("DELETE FROM llm_responses WHERE created < ?", (now - ttl,))
+                conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN "
+                    "(SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,)
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Response cache write skipped: {e}")
+
+# Function to call Gemini through the response cache
+def generate_content_cached(model_name, contents, use_cache=True, priority=PRIORITY_INTERACTIVE, retries=None):
+    """
+    Return the response text for a Gemini request, reusing a cached response
+    for identical inputs. Responses are cached under the route's primary model;
+    an answer from a fallback model (after a quota error) is not cached, so the
+    primary model answers again once it has recovered.
+
+    Args:
+        model_name (str): Task type ("ocr", "extract", "score", "generate"), see
+            resai.gemini.ModelRouter, or Gemini model to call
+        contents (list): Request parts (text and image parts)
+        use_cache (bool): False to force a fresh generation (the result is still stored)
+        priority (int): Scheduling priority in the shared Gemini client
+        retries (int): Override the shared client's retry count
+
+    Returns:
+        str: Response text
+    """
+    primary = primary_model(model_name)
+    key = llm_cache_key(primary, contents)
+    if use_cache:
+        cached = llm_cache_get(key)
+        if cached is not None:
+            return cached
+    route = {}
+    response_text = get_gemini_client().generate_content(model_name, contents, priority, retries, route=route).text
+    if route.get("model") == primary:
+        llm_cache_put(key, primary, response_text)
+    return response_text
+
+# Function to stream a Gemini response chunk by chunk through the response cache
+def generate_content_streamed(model_name, contents, on_text, use_cache=True, priority=PRIORITY_INTERACTIVE):
+    """
+    Like generate_content_cached, but calls on_text with the text received so
+    far after every streamed chunk. A cached response is delivered in one call.
+
+    Returns:
+        str: The full response text once the stream has finished
+    """
+    primary = primary_model(model_name)
+    key = llm_cache_key(primary, contents)
+    if use_cache:
+        cached = llm_cache_get(key)
+        if cached is not None:
+            on_text(cached)
+            return cached
+    route = {}
+    response_text = ""
+    for chunk_text in get_gemini_client().stream_content(model_name, contents, priority, route=route):
+        response_text += chunk_text
+        on_text(response_text)
+    if route.get("model") == primary:
+        llm_cache_put(key, primary, response_text)
+    return response_text
+
+# Function to get a feature response from Gemini for a prompt, the resume and a job description
+def generate_feature_response(input_prompt, pdf_content, job_desc_input, use_cache=True, on_text=None,
+                              resume_text=None, profile_text=None, prefer_profile=False):
+    """
+    Run one feature prompt against the resume and job description.
+
+    Args:
+        input_prompt (str): Feature prompt (see resai.prompts)
+        pdf_content (list): Resume page image parts, sent when no resume text is given
+        job_desc_input (str): Job description
+        use_cache (bool): False to force a fresh generation
+        on_text (callable): If set, the response is streamed and on_text is
+            called with the text received so far after every chunk
+        resume_text (str): Complete extracted resume text, sent instead of the images
+        profile_text (str): Compact candidate profile, sent instead of the images when there is no resume text
+        prefer_profile (bool): Send the profile instead of the resume text too
+
+    Returns:
+        str: Response text
+    """
+    contents = build_feature_payload(input_prompt, pdf_content, job_desc_input, resume_text,
+                                     profile_text=profile_text, prefer_profile=prefer_profile)
+    if on_text is not None:
+        return generate_content_streamed("generate", contents, on_text, use_cache)
+    return generate_content_cached("generate", contents, use_cache)
+
+# Function to parse the percentage match from the response
+def parse_percentage(response_text):
+    match = re.search(r'(\d+)%', response_text)
+    if match:
+        return int(match.group(1))
+    return 0
+
+# Function to parse a JSON object or array from a Gemini response
+def parse_json_response(response_text):
+    """
+    Parse JSON from a model response, tolerating markdown code fences and
+    surrounding prose. Raises ValueError if no JSON value can be decoded.
+    """
+    text = response_text.strip()
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    starts = [i for i in (text.find('['), text.find('{')) if i != -1]
+    if not starts:
+        raise ValueError("No JSON found in response")
+    value, _ = json.JSONDecoder().raw_decode(text[min(starts):])
+    return value
@@ -0,0 +1,194 @@
+"""
+Lightweight per-stage instrumentation: wall time, payload bytes and Gemini token usage.
+
+A run (one app rerun, one batch pair, ...) collects the stages executed while
+it is current; every stage also feeds process-wide aggregates that can be
+exported as JSON lines or a Prometheus text file.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+from .config import METRICS_JSONL_PATH, METRICS_PROMETHEUS_PATH
+
+CURRENT_RUN = contextvars.ContextVar("resai_current_run", default=None)
+
+_aggregates = {}
+_aggregates_lock = threading.Lock()
+
+# Stages recorded while one run is current
+class Run:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.stages.append(record)
+
+    def extend(self, records):
+        with self._lock:
+            self.stages.extend(records)
+
+    def summary(self):
+        with self._lock:
+            stages = list(self.stages)
+        return {
+            "run": self.name,
+            "started": self.started,
+            "seconds": time.time() - self.started,
+            "stages": stages,
+        }
+
+# Function to start a run and make it current for this thread/context
+def start_run(name):
+    run = Run(name)
+    CURRENT_RUN.set(run)
+    return run
+
+# Function to finish a run, exporting it and the aggregates where configured
+def finish_run(run, jsonl_path=METRICS_JSONL_PATH, prometheus_path=METRICS_PROMETHEUS_PATH):
+    summary = run.summary()
+    if jsonl_path:
+        export_jsonl(summary, jsonl_path)
+    if prometheus_path:
+        export_prometheus(prometheus_path)
+    return summary
+
+# Function to add stages recorded in another run (e.g. a background job's) to the current run
+def add_stages(records):
+    # The stages were already counted in the aggregates when they were recorded
+    run = CURRENT_RUN.get()
+    if run is not None:
+        run.extend(records)
+
+# Function to wrap a callable so it runs with the caller's current run (for thread pools)
+def in_current_context(fn):
+    context = contextvars.copy_context()
+
+    def run_in_context(*args, **kwargs):
+        # Each call gets its own copy: one Context cannot be entered by two threads at once
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run_in_context
+
+# Function to time a stage and record it in the current run and the aggregates
+@contextlib.contextmanager
+def stage(name, **attrs):
+    """
+    Time a block of work. The yielded dict can be updated with 'bytes',
+    'prompt_tokens', 'output_tokens' or any other attribute while the block runs.
+    """
+    record = {"stage": name, **attrs}
+    start = time.perf_counter()
+    try:
+        yield record
+    except GeneratorExit:
+        # A stream closed early by its consumer is not a failure
+        record["cancelled"] = True
+        raise
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        run = CURRENT_RUN.get()
+        if run is not None:
+            run.add(record)
+        _aggregate(record)
+
+# Function to set the Gemini token counts of a stage record, also once the stage has finished
+def record_usage(record, prompt_tokens, output_tokens, source):
+    """
+    Args:
+        record (dict): Record yielded by stage
+        prompt_tokens (int): Input tokens
+        output_tokens (int): Generated tokens
+        source (str): Where the counts come from: "usage_metadata", "count_tokens" or "estimate"
+    """
+    with _aggregates_lock:
+        record["prompt_tokens"] = prompt_tokens
+        record["output_tokens"] = output_tokens
+        record["token_source"] = source
+        # A finished stage was already aggregated without its tokens
+        totals = _aggregates.get(record["stage"]) if "seconds" in record else None
+        if totals is not None:
+            totals["prompt_tokens"] += prompt_tokens
+            totals["output_tokens"] += output_tokens
+
+# Function to measure the payload size of request parts
+def payload_bytes(contents):
+    total = 0
+    for part in contents:
+        if isinstance(part, dict):
+            total += len(part["data"])
+        else:
+            total += len(str(part).encode())
+    return total
+
+def _aggregate(record):
+    with _aggregates_lock:
+        totals = _aggregates.setdefault(record["stage"], {
+            "calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+            "bytes": 0, "prompt_tokens": 0, "output_tokens": 0,
+        })
+        totals["calls"] += 1
+        totals["errors"] += 1 if "error" in record else 0
+        totals["seconds"] += record["seconds"]
+        totals["max_seconds"] = max(totals["max_seconds"], record["seconds"])
+        for key in ("bytes", "prompt_tokens", "output_tokens"):
+            totals[key] += record.get(key) or 0
+
+# Function to get a snapshot of the process-wide per-stage aggregates
+def aggregates():
+    with _aggregates_lock:
+        return {name: dict(totals) for name, totals in _aggregates.items()}
+
+# Function to format the aggregates as JSON lines, one per stage
+def aggregates_jsonl():
+    return "".join(json.dumps({"stage": name, **totals}) + "\n" for name, totals in sorted(aggregates().items()))
+
+# Function to append a run summary as one JSON line
+def export_jsonl(summary, path):
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+    except OSError as e:
+        print(f"Metrics export skipped: {e}")
+
+# Function to format the aggregates in the Prometheus text exposition format
+def prometheus_text():
+    metrics = [
+        ("resai_stage_calls_total", "counter", "Stage executions", "calls"),
+        ("resai_stage_errors_total", "counter", "Stage executions that raised", "errors"),
+        ("resai_stage_seconds_total", "counter", "Total wall time per stage", "seconds"),
+        ("resai_stage_max_seconds", "gauge", "Slowest execution per stage", "max_seconds"),
+        ("resai_stage_bytes_total", "counter", "Payload bytes per stage", "bytes"),
+        ("resai_stage_prompt_tokens_total", "counter", "Gemini prompt tokens per stage", "prompt_tokens"),
+        ("resai_stage_output_tokens_total", "counter", "Gemini output tokens per stage", "output_tokens"),
+    ]
+    snapshot = aggregates()
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, totals in sorted(snapshot.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{metric}{{stage="{label}"}} {totals[key]}')
+    return "\n".join(lines) + "\n"
+
+# Function to write the aggregates to a Prometheus text file (e.g. for node_exporter's textfile collector)
+def export_prometheus(path):
+    # Write then rename, so a scraper never reads a half-written file
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Metrics export skipped: {e}")
@@ -0,0 +1,143 @@
+"""
+Request payload builder: sends resume text instead of images when possible, shrinks images and enforces a token budget.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from .config import (
+    PAYLOAD_IMAGE_MAX_BYTES,
+    PAYLOAD_IMAGE_MAX_SIDE,
+    PAYLOAD_MODE,
+    PAYLOAD_TOKEN_BUDGET,
+)
+from .gemini import CHARS_PER_TOKEN, estimate_tokens, get_gemini_client
+from .metrics import stage
+
+TRUNCATION_MARKER = "\n[...truncated to fit the request budget]"
+
+# Shrunk pages by (page hash, max_side, max_bytes); only the small output is kept, never the input page
+SHRUNK_PAGES_MAX_ENTRIES = 64
+_shrunk_pages = OrderedDict()
+_shrunk_pages_lock = threading.Lock()
+
+# Function to downscale and recompress a JPEG page until it fits the target size
+def recompress_jpeg(jpeg_bytes, max_side=PAYLOAD_IMAGE_MAX_SIDE, max_bytes=PAYLOAD_IMAGE_MAX_BYTES):
+    if len(jpeg_bytes) <= max_bytes:
+        with Image.open(io.BytesIO(jpeg_bytes)) as img:
+            if max(img.size) <= max_side:
+                return jpeg_bytes
+    with Image.open(io.BytesIO(jpeg_bytes)) as img:
+        img = img.convert("L" if img.mode == "L" else "RGB")
+        img.thumbnail((max_side, max_side))
+        data = jpeg_bytes
+        for quality in (85, 75, 65, 55, 45, 35):
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=quality, optimize=True)
+            data = buffer.getvalue()
+            if len(data) <= max_bytes:
+                break
+        return data
+
+# Function to shrink a JPEG page, reusing the result for a page already shrunk in this process
+def shrink_jpeg(jpeg_bytes, max_side=PAYLOAD_IMAGE_MAX_SIDE, max_bytes=PAYLOAD_IMAGE_MAX_BYTES):
+    key = (hashlib.sha256(jpeg_bytes).hexdigest(), max_side, max_bytes)
+    with _shrunk_pages_lock:
+        data = _shrunk_pages.get(key)
+        if data is not None:
+            _shrunk_pages.move_to_end(key)
+            return data
+    data = recompress_jpeg(jpeg_bytes, max_side, max_bytes)
+    with _shrunk_pages_lock:
+        _shrunk_pages[key] = data
+        _shrunk_pages.move_to_end(key)
+        while len(_shrunk_pages) > SHRUNK_PAGES_MAX_ENTRIES:
+            _shrunk_pages.popitem(last=False)
+    return data
+
+# Function to count the input tokens of a request, preferring the model's own count
+def count_tokens(contents, model_name="generate"):
+    try:
+        return get_gemini_client().count_tokens(model_name, contents)
+    except Exception as e:
+        print(f"count_tokens failed, using an estimate: {e}")
+        return estimate_tokens(contents)
+
+# Function to cut text down to roughly the given number of tokens
+def truncate_to_tokens(text, max_tokens):
+    max_chars = max(0, int(max_tokens) * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - len(TRUNCATION_MARKER))] + TRUNCATION_MARKER
+
+# Function to build the request parts for a feature prompt
+def build_feature_payload(input_prompt, pdf_content, job_desc_input, resume_text=None, mode=PAYLOAD_MODE,
+                          token_budget=PAYLOAD_TOKEN_BUDGET, model_name="generate", profile_text=None,
+                          prefer_profile=False):
+    """
+    Build the smallest request that still carries the resume.
+
+    Already-extracted resume text is sent instead of page images when it is
+    available (mode "auto" or "text"). Without text, mode "auto" sends the
+    compact structured profile (see resai.profile) when one is given; failing
+    that, every page image is sent, downscaled and recompressed. Short prompts
+    that only need the candidate's skills and titles set prefer_profile to send
+    the profile even when there is text. Text parts are trimmed so the request stays
+    within token_budget: the local estimate is used while comfortably under
+    budget, and count_tokens is consulted once it gets close.
+
+    Args:
+        input_prompt (str): Feature prompt
+        pdf_content (list): Resume page image parts
+        job_desc_input (str): Job description
+        resume_text (str): Complete extracted resume text, or None if unavailable
+        mode (str): "auto", "text" or "image"
+        token_budget (int): Maximum input tokens per request
+        model_name (str): Task type or model used for count_tokens
+        profile_text (str): Compact candidate profile, see resai.profile.profile_summary
+        prefer_profile (bool): Send the profile instead of the resume text too, not only instead of the images
+
+    Returns:
+        list: Request parts for generate_content
+    """
+    has_text = bool(resume_text and resume_text.strip()) and mode != "image"
+    use_profile = bool(profile_text) and mode == "auto" and (prefer_profile or not has_text)
+    use_text = use_profile or has_text
+    if use_profile:
+        resume_parts = [f"Candidate Profile:\n{profile_text}"]
+    elif use_text:
+        resume_parts = [f"Resume:\n{resume_text}"]
+    else:
+        with stage("encode_images", pages=len(pdf_content)) as record:
+            resume_parts = [{"mime_type": part["mime_type"], "data": shrink_jpeg(part["data"])}
+                            for part in pdf_content]
+            record["bytes"] = sum(len(part["data"]) for part in resume_parts)
+    job_desc_part = f"Job Description:\n{job_desc_input}"
+
+    contents = [input_prompt] + resume_parts + [job_desc_part]
+    estimate = estimate_tokens(contents)
+    if estimate < 0.8 * token_budget:
+        return contents
+    with stage("count_tokens"):
+        tokens = count_tokens(contents, model_name)
+
+    # Trim the job description and resume text in proportion to their share of the overflow
+    for _ in range(3):
+        overflow = tokens - token_budget
+        if overflow <= 0:
+            break
+        trimmable = [job_desc_part] + (resume_parts if use_text else [])
+        trimmable_tokens = sum(estimate_tokens([part]) for part in trimmable)
+        if trimmable_tokens == 0:
+            break
+        # Aim slightly under budget, since the local estimate and count_tokens differ
+        keep_ratio = max(0.0, (trimmable_tokens - overflow) / trimmable_tokens * 0.97)
+        job_desc_part = truncate_to_tokens(job_desc_part, estimate_tokens([job_desc_part]) * keep_ratio)
+        if use_text:
+            resume_parts = [truncate_to_tokens(resume_parts[0], estimate_tokens(resume_parts) * keep_ratio)]
+        contents = [input_prompt] + resume_parts + [job_desc_part]
+        tokens = count_tokens(contents, model_name)
+    return contents
@@ -0,0 +1,360 @@
+"""
+Resume PDF processing: lazy rasterization, text-layer extraction, concurrent OCR and the on-disk resume cache.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .config import (
+    MODEL_ROUTES,
+    OCR_MAX_WORKERS,
+    OCR_PROMPT,
+    OCR_RETRIES,
+    RASTER_SETTINGS,
+    RASTER_THREADS,
+    RESUME_CACHE_DIR,
+    RESUME_CACHE_MAX_BYTES,
+    TEXT_LAYER_MIN_CHARS,
+)
+from .gemini import PRIORITY_BACKGROUND
+from .jobs import JobCancelled, check_cancelled, report_progress
+from .llm import generate_content_cached
+from .metrics import in_current_context, stage
+from .profile import profile_path
+
+# Function to build the Gemini image part for a JPEG page
+def jpeg_part(jpeg_bytes):
+    return {
+        "mime_type": "image/jpeg",
+        "data": jpeg_bytes
+    }
+
+# Function to rasterize PDF pages lazily, encoding each page exactly once
+def iter_pdf_pages(pdf_bytes, settings=RASTER_SETTINGS, thread_count=RASTER_THREADS):
+    """
+    Yield each page as compressed JPEG bytes, in document order.
+
+    Pages are rendered in small batches of `thread_count` pages straight to
+    JPEG files by poppler, so no full-size PIL images are ever held in memory
+    and at most one batch of pages is on disk at a time.
+
+    Args:
+        pdf_bytes (bytes): Raw PDF file
+        settings (dict): DPI, grayscale, JPEG quality and page cap
+        thread_count (int): Pages rendered in parallel per batch
+
+    Yields:
+        bytes: JPEG-encoded page
+    """
+    import pdf2image
+
+    page_count = pdf2image.pdfinfo_from_bytes(pdf_bytes)["Pages"]
+    last_page = min(page_count, settings["max_pages"])
+    batch_size = max(1, thread_count)
+    for first_page in range(1, last_page + 1, batch_size):
+        # The batch is read before yielding, so the stage does not include the consumer's time
+        with stage("rasterize", first_page=first_page) as record, tempfile.TemporaryDirectory() as tmp_dir:
+            paths = pdf2image.convert_from_bytes(
+                pdf_bytes,
+                dpi=settings["dpi"],
+                fmt=settings["fmt"],
+                jpegopt={"quality": settings["jpeg_quality"], "optimize": True},
+                grayscale=settings["grayscale"],
+                first_page=first_page,
+                last_page=min(first_page + batch_size - 1, last_page),
+                thread_count=batch_size,
+                output_folder=tmp_dir,
+                paths_only=True
+            )
+            batch = []
+            # pdf2image returns the paths in page order; the file names carry random prefixes, so never sort them
+            for path in paths:
+                with open(path, "rb") as f:
+                    batch.append(f.read())
+            record["pages"] = len(batch)
+            record["bytes"] = sum(len(page) for page in batch)
+        yield from batch
+
+# Function to process PDF
+def input_pdf_setup(uploaded_file):
+    if uploaded_file is not None:
+        pages = list(iter_pdf_pages(uploaded_file.read()))
+        if not pages:
+            raise ValueError("The uploaded PDF has no pages")
+        pdf_parts = [jpeg_part(pages[0])]
+        return pdf_parts, pages
+    else:
+        raise FileNotFoundError("No file uploaded")
+
+# Function to OCR a single page image; OCR yields to interactive calls in the shared client
+def ocr_page(page, retries=OCR_RETRIES):
+    with stage("ocr_page", bytes=len(page)):
+        return generate_content_cached("ocr", [OCR_PROMPT, jpeg_part(page)],
+                                       priority=PRIORITY_BACKGROUND, retries=retries)
+
+# Function to OCR all pages concurrently
+def ocr_pages(pages, max_workers=OCR_MAX_WORKERS):
+    """
+    OCR every page with bounded concurrency, keeping page order.
+
+    Pages are submitted as they are produced, so passing a lazy iterator
+    overlaps rasterization with OCR. Each page is retried on its own; a page
+    that still fails yields None instead of aborting the whole document.
+    Inside a background job, per-page progress is reported and a cancel
+    stops submitting pages and drops the ones not yet started.
+
+    Args:
+        pages (iterable): JPEG-encoded pages in document order
+        max_workers (int): Maximum number of concurrent OCR requests (1 = sequential)
+
+    Returns:
+        list: Extracted text per page, None for pages that failed
+    """
+    texts = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+        try:
+            for i, page in enumerate(pages):
+                check_cancelled()
+                texts.append(None)
+                futures[executor.submit(in_current_context(ocr_page), page)] = i
+                report_progress(total=len(futures), message=f"OCR: {len(futures)} page(s) queued")
+            for done, future in enumerate(as_completed(futures), 1):
+                page_index = futures[future]
+                try:
+                    texts[page_index] = future.result()
+                except Exception as e:
+                    print(f"OCR failed for page {page_index + 1}: {e}")
+                report_progress(done, len(futures), f"OCR: {done} of {len(futures)} page(s) done")
+                check_cancelled()
+        except JobCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+    return texts
+
+# Function to join per-page text, marking pages that could not be extracted
+def join_page_texts(texts):
+    text = ""
+    for i, page_text in enumerate(texts, 1):
+        if page_text is None:
+            page_text = f"[Page {i}: text extraction failed]"
+        text += page_text + "\n"
+    return text
+
+# Function to read the embedded text layer of each page with poppler's pdftotext
+def extract_text_layer(pdf_bytes, last_page=RASTER_SETTINGS["max_pages"]):
+    """
+    Extract the born-digital text of every page (up to last_page) without any LLM call.
+
+    Returns:
+        list: Text per page, or an empty list if pdftotext is unavailable or fails
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "resume.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        try:
+            result = subprocess.run(
+                ["pdftotext", "-layout", "-enc", "UTF-8", "-l", str(last_page), pdf_path, "-"],
+                capture_output=True,
+                timeout=30,
+                check=True
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Text layer extraction unavailable: {e}")
+            return []
+    output = result.stdout.decode("utf-8", errors="replace")
+    # pdftotext ends every page with a form feed
+    if output.endswith("\f"):
+        output = output[:-1]
+    return output.split("\f")
+
+# Function to check whether a page's text layer has enough content to skip OCR
+def has_usable_text(page_text, min_chars=TEXT_LAYER_MIN_CHARS):
+    return len(re.sub(r'\s', '', page_text)) >= min_chars
+
+# Function to extract per-page text, using the text layer first and OCR only where needed
+def extract_page_texts(pdf_bytes, pages, max_workers=OCR_MAX_WORKERS):
+    """
+    Read each page from the PDF text layer when it has usable text and OCR the rest.
+
+    `pages` may be a lazy iterator (see iter_pdf_pages); it is consumed once.
+
+    Returns:
+        tuple: (texts, sources) where sources[i] is "text-layer", "ocr" or "failed"
+    """
+    text_layer = []
+    if pdf_bytes is not None:
+        with stage("text_layer", bytes=len(pdf_bytes)):
+            text_layer = extract_text_layer(pdf_bytes)
+    texts = []
+    sources = []
+    ocr_indices = []
+
+    def pages_needing_ocr():
+        for i, page in enumerate(pages):
+            if i < len(text_layer) and has_usable_text(text_layer[i]):
+                texts.append(text_layer[i])
+                sources.append("text-layer")
+            else:
+                texts.append(None)
+                sources.append("ocr")
+                ocr_indices.append(i)
+                yield page
+
+    ocr_texts = ocr_pages(pages_needing_ocr(), max_workers)
+    for i, page_text in zip(ocr_indices, ocr_texts):
+        texts[i] = page_text
+        if page_text is None:
+            sources[i] = "failed"
+    return texts, sources
+
+# Function to extract text from resume
+def extract_text_from_pdf(pages, pdf_bytes=None, max_workers=OCR_MAX_WORKERS):
+    texts, sources = extract_page_texts(pdf_bytes, pages, max_workers)
+    return join_page_texts(texts)
+
+# Function to compute the cache key for an uploaded resume
+def resume_cache_key(pdf_bytes, settings=RASTER_SETTINGS):
+    """
+    Hash the uploaded bytes together with everything that changes the
+    processed output (rasterization settings, OCR models and prompt).
+    """
+    digest = hashlib.sha256(pdf_bytes)
+    digest.update(json.dumps({"raster": settings, "ocr_models": MODEL_ROUTES["ocr"], "ocr_prompt": OCR_PROMPT,
+                              "text_layer_min_chars": TEXT_LAYER_MIN_CHARS},
+                             sort_keys=True).encode())
+    return digest.hexdigest()
+
+# Function to load a processed resume from the on-disk cache
+def load_cached_resume(key, cache_dir=RESUME_CACHE_DIR):
+    """
+    Return (page_jpegs, text, page_sources) for a cached resume, or None on a miss.
+
+    A hit refreshes the entry's access time so eviction is least-recently-used.
+    """
+    entry_dir = os.path.join(cache_dir, "resumes", key)
+    meta_path = os.path.join(entry_dir, "meta.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        pages = []
+        for i in range(meta["pages"]):
+            with open(os.path.join(entry_dir, f"page_{i:03d}.jpg"), "rb") as f:
+                pages.append(f.read())
+        with open(os.path.join(entry_dir, "text.txt"), encoding="utf-8") as f:
+            text = f.read()
+    except (OSError, ValueError, KeyError):
+        return None
+    os.utime(meta_path)
+    return pages, text, meta.get("page_sources", [])
+
+# Function to store a processed resume in the on-disk cache
+def store_cached_resume(key, pages, text, page_sources, cache_dir=RESUME_CACHE_DIR, max_bytes=RESUME_CACHE_MAX_BYTES):
+    resumes_dir = os.path.join(cache_dir, "resumes")
+    entry_dir = os.path.join(resumes_dir, key)
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{time.time_ns()}"
+    try:
+        os.makedirs(tmp_dir)
+        for i, page in enumerate(pages):
+            with open(os.path.join(tmp_dir, f"page_{i:03d}.jpg"), "wb") as f:
+                f.write(page)
+        with open(os.path.join(tmp_dir, "text.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        # meta.json is written last: its presence marks a complete entry
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"pages": len(pages), "page_sources": page_sources, "created": time.time()}, f)
+        os.rename(tmp_dir, entry_dir)
+    except OSError as e:
+        # Another session stored the same resume first, or the disk is unavailable
+        print(f"Resume cache write skipped: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    evict_resume_cache(cache_dir, max_bytes)
+
+# Function to evict least-recently-used resumes once the cache exceeds its size limit
+def evict_resume_cache(cache_dir=RESUME_CACHE_DIR, max_bytes=RESUME_CACHE_MAX_BYTES):
+    """
+    A resume's stored profile (see resai.profile) counts toward its size and is
+    evicted with it; profiles whose resume is no longer cached are removed.
+    """
+    resumes_dir = os.path.join(cache_dir, "resumes")
+    entries = []
+    total = 0
+    names = set(os.listdir(resumes_dir))
+    for name in names:
+        entry_dir = os.path.join(resumes_dir, name)
+        try:
+            last_access = os.path.getmtime(os.path.join(entry_dir, "meta.json"))
+            size = sum(e.stat().st_size for e in os.scandir(entry_dir))
+        except OSError:
+            # Incomplete or concurrently removed entry
+            continue
+        try:
+            size += os.path.getsize(profile_path(name, cache_dir))
+        except OSError:
+            pass
+        entries.append((last_access, size, name))
+        total += size
+    for last_access, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(os.path.join(resumes_dir, name), ignore_errors=True)
+        names.discard(name)
+        total -= size
+    profiles_dir = os.path.dirname(profile_path("", cache_dir))
+    try:
+        stored_profiles = os.listdir(profiles_dir)
+    except OSError:
+        return
+    for filename in stored_profiles:
+        if filename.endswith(".json") and filename[:-len(".json")] not in names:
+            try:
+                os.remove(os.path.join(profiles_dir, filename))
+            except OSError:
+                pass
+
+# Function to process a resume PDF, reusing cached pages and text when available
+def process_pdf(pdf_bytes):
+    """
+    Rasterize and extract text from a resume PDF, or load both from the on-disk cache.
+
+    Args:
+        pdf_bytes (bytes): Raw resume PDF
+
+    Returns:
+        tuple: (pdf_parts, resume_text, page_sources) where pdf_parts holds one image
+        part per page and page_sources records how each page's text was obtained
+    """
+    key = resume_cache_key(pdf_bytes)
+    with stage("resume_cache_lookup") as record:
+        cached = load_cached_resume(key)
+        record["hit"] = cached is not None
+    if cached is not None:
+        pages, text, page_sources = cached
+        return [jpeg_part(page) for page in pages], text, page_sources
+
+    # Pages stream from the rasterizer into OCR; the encoded JPEGs are kept for the cache and prompts
+    pages = []
+
+    def rendered_pages():
+        for page in iter_pdf_pages(pdf_bytes):
+            pages.append(page)
+            report_progress(message=f"Rendered page {len(pages)}")
+            yield page
+
+    page_texts, page_sources = extract_page_texts(pdf_bytes, rendered_pages())
+    if not pages:
+        raise ValueError("The PDF has no pages")
+    text = join_page_texts(page_texts)
+    # Only complete results are cached, so failed pages are retried on the next run
+    if "failed" not in page_sources:
+        store_cached_resume(key, pages, text, page_sources)
+    return [jpeg_part(page) for page in pages], text, page_sources
@@ -0,0 +1,193 @@
+"""
+Headless batch pipeline: score many resumes against many job descriptions, streaming JSONL results.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import BATCH_LLM_WORKERS, BATCH_PDF_WORKERS
+from .llm import generate_feature_response, parse_percentage
+from .metrics import finish_run, start_run
+from .pdf import process_pdf
+from .prompts import FEATURE_PROMPTS
+from .scoring import local_match_score
+
+RESUME_EXTENSIONS = (".pdf",)
+JOB_EXTENSIONS = (".txt", ".md")
+
+# Function to list the files in a directory with the given extensions, sorted by name
+def list_files(directory, extensions):
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(extensions) and os.path.isfile(os.path.join(directory, name))
+    )
+
+# Function to normalize a (resume, job) pair of paths, so "resumes/a.pdf" and "./resumes/a.pdf" match
+def pair_key(resume_path, job_path):
+    return os.path.realpath(resume_path), os.path.realpath(job_path)
+
+# Function to read the (resume, job) pairs already completed in a results file, as normalized paths
+def completed_pairs(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Partially written last line from an interrupted run
+                continue
+            if record.get("status") == "ok":
+                done.add(pair_key(record["resume"], record["job"]))
+    return done
+
+# Function to check whether a file ends with a line break
+def ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+# Function to process a resume PDF file, timing the work
+def process_resume_file(resume_path):
+    start = time.perf_counter()
+    with open(resume_path, "rb") as f:
+        processed = process_pdf(f.read())
+    return processed, time.perf_counter() - start
+
+# Function to score one processed resume against one job description
+def score_pair(processed, job_desc, features=("analysis",), use_cache=True):
+    """
+    Compute the local match score and run the requested feature prompts.
+
+    Args:
+        processed (tuple): (pdf_parts, resume_text, page_sources) from process_pdf
+        job_desc (str): Job description text
+        features (tuple): Names from resai.prompts.FEATURE_PROMPTS to run
+        use_cache (bool): False to bypass the Gemini response cache
+
+    Returns:
+        dict: Scores, feature responses and per-stage timings in seconds
+    """
+    pdf_content, resume_text, page_sources = processed
+    timings = {}
+
+    start = time.perf_counter()
+    local_match = local_match_score(resume_text, job_desc)
+    timings["local_score"] = time.perf_counter() - start
+
+    # Extracted text replaces the page images unless some page could not be read
+    prompt_resume_text = resume_text if "failed" not in page_sources else None
+    responses = {}
+    for feature in features:
+        start = time.perf_counter()
+        responses[feature] = generate_feature_response(FEATURE_PROMPTS[feature], pdf_content, job_desc, use_cache,
+                                                       resume_text=prompt_resume_text)
+        timings[feature] = time.perf_counter() - start
+
+    result = {
+        "local_score": local_match["score"],
+        "page_sources": page_sources,
+        "responses": responses,
+        "timings": timings,
+    }
+    if "analysis" in responses:
+        result["match_percentage"] = parse_percentage(responses["analysis"])
+    return result
+
+# Function to run every resume against every job description
+def run_batch(resume_paths, job_paths, output_path, features=("analysis",), pdf_workers=BATCH_PDF_WORKERS,
+              llm_workers=BATCH_LLM_WORKERS, use_cache=True, resume=True, on_record=None):
+    """
+    Run a resume x job description batch through a bounded-concurrency pipeline.
+
+    Each resume is processed once (on a pool of pdf_workers) and shared by all
+    of its pairs; pairs are scored on a pool of llm_workers. At most
+    2 x pdf_workers processed resumes are held at a time: a resume is dropped
+    once its last pair finishes, and the next one is only processed then. One
+    JSON line is appended to output_path per pair as soon as it finishes, so an
+    interrupted run can be resumed: pairs already recorded with status "ok" are
+    skipped, whichever spelling of the same paths was used.
+
+    Args:
+        resume_paths (list): Resume PDF paths
+        job_paths (list): Job description text file paths
+        output_path (str): JSONL results file
+        features (tuple): Feature prompts to run per pair (empty for local scores only)
+        pdf_workers (int): Resumes processed concurrently
+        llm_workers (int): Pairs scored concurrently
+        use_cache (bool): False to bypass the Gemini response cache
+        resume (bool): Skip pairs completed by a previous run instead of starting over
+        on_record (callable): Called with each record as it is written (from a worker thread, one at a time)
+
+    Returns:
+        dict: Counts of "ok", "error" and "skipped" pairs
+    """
+    done = completed_pairs(output_path) if resume else set()
+    pending = [(r, j) for r in resume_paths for j in job_paths if pair_key(r, j) not in done]
+    counts = {"ok": 0, "error": 0, "skipped": len(resume_paths) * len(job_paths) - len(pending)}
+    if not pending:
+        return counts
+
+    job_descs = {}
+    for job_path in job_paths:
+        with open(job_path, encoding="utf-8") as f:
+            job_descs[job_path] = f.read()
+
+    lock = threading.Lock()
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=max(1, pdf_workers)) as pdf_pool, \
+            ThreadPoolExecutor(max_workers=max(1, llm_workers)) as llm_pool:
+        if resume and out.tell() and not ends_with_newline(output_path):
+            # Close the partially written last line of an interrupted run, or the first new record joins it
+            out.write("\n")
+        jobs_by_resume = {}
+        for r, j in pending:
+            jobs_by_resume.setdefault(r, []).append(j)
+        # Bounds the processed resumes (page images included) held in memory
+        resident = threading.Semaphore(2 * max(1, pdf_workers))
+        resume_futures = {}
+        remaining = {}
+
+        def run_pair(resume_path, job_path):
+            record = {"resume": resume_path, "job": job_path}
+            run = start_run(f"batch:{os.path.basename(resume_path)}:{os.path.basename(job_path)}")
+            start = time.perf_counter()
+            try:
+                processed, process_seconds = resume_futures[resume_path].result()
+                record.update(score_pair(processed, job_descs[job_path], features, use_cache))
+                record["timings"]["process_pdf"] = process_seconds
+                record["status"] = "ok"
+            except Exception as e:
+                record["status"] = "error"
+                record["error"] = str(e)
+            record["seconds"] = time.perf_counter() - start
+            with lock:
+                try:
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    counts[record["status"]] += 1
+                    if on_record is not None:
+                        on_record(record)
+                finally:
+                    remaining[resume_path] -= 1
+                    if not remaining[resume_path]:
+                        # The last pair of this resume is done: free its pages for the next resume
+                        del resume_futures[resume_path]
+                        resident.release()
+            finish_run(run)
+
+        # Pair workers wait on resume futures from a separate pool, so they can never starve it
+        futures = []
+        for resume_path, resume_jobs in jobs_by_resume.items():
+            resident.acquire()
+            with lock:
+                remaining[resume_path] = len(resume_jobs)
+                resume_futures[resume_path] = pdf_pool.submit(process_resume_file, resume_path)
+            futures += [llm_pool.submit(run_pair, resume_path, job_path) for job_path in resume_jobs]
+        for future in futures:
+            future.result()
+    return counts
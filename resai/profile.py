@@ -0,0 +1,121 @@
+"""
+Structured resume profile: extracted once per resume and reused by search, highlighting and feature prompts.
+"""
+import json
+import os
+import time
+
+from .config import RESUME_CACHE_DIR
+from .llm import generate_content_cached, parse_json_response
+
+PROFILE_PROMPT = """
+    Extract a structured profile from this resume. Respond with only a JSON object of this shape:
+    {"name": "<full name or empty>",
+     "titles": ["<job titles held, most recent first>"],
+     "years_experience": <total years of professional experience as a number>,
+     "skills": ["<technical and professional skills, most prominent first>"],
+     "experience": [{"title": "...", "company": "...", "start": "...", "end": "...",
+                     "highlights": ["<key achievement, one short sentence>"]}],
+     "education": [{"degree": "...", "institution": "...", "year": "..."}]}
+    Use only information present in the resume.
+    """
+
+# Version of the prompt and schema above; bump it to invalidate stored profiles
+PROFILE_VERSION = 1
+
+# Function to coerce a model-produced profile into the expected shape
+def normalize_profile(raw):
+    if not isinstance(raw, dict):
+        raise ValueError("Profile is not a JSON object")
+
+    def strings(value):
+        return [str(v).strip() for v in value if str(v).strip()] if isinstance(value, list) else []
+
+    def entries(value, fields):
+        items = []
+        for entry in value if isinstance(value, list) else []:
+            if isinstance(entry, dict):
+                item = {field: str(entry.get(field) or "").strip() for field in fields}
+                if "highlights" in entry:
+                    item["highlights"] = strings(entry["highlights"])
+                items.append(item)
+        return items
+
+    try:
+        years = float(raw.get("years_experience"))
+    except (TypeError, ValueError):
+        years = None
+    return {
+        "name": str(raw.get("name") or ""),
+        "titles": strings(raw.get("titles")),
+        "years_experience": years,
+        "skills": list(dict.fromkeys(strings(raw.get("skills")))),
+        "experience": [{"highlights": [], **entry}
+                       for entry in entries(raw.get("experience"), ("title", "company", "start", "end"))],
+        "education": entries(raw.get("education"), ("degree", "institution", "year")),
+    }
+
+# Function to render a profile as compact prompt text
+def profile_summary(profile, max_skills=30, max_highlights=3):
+    lines = []
+    if profile["titles"]:
+        lines.append(f"Titles: {', '.join(profile['titles'])}")
+    if profile["years_experience"] is not None:
+        lines.append(f"Years of experience: {profile['years_experience']:g}")
+    if profile["skills"]:
+        lines.append(f"Skills: {', '.join(profile['skills'][:max_skills])}")
+    if profile["experience"]:
+        lines.append("Experience:")
+        for entry in profile["experience"]:
+            period = " - ".join(p for p in (entry["start"], entry["end"]) if p)
+            lines.append(f"- {entry['title']}, {entry['company']}" + (f" ({period})" if period else ""))
+            lines += [f"  - {highlight}" for highlight in entry["highlights"][:max_highlights]]
+    if profile["education"]:
+        lines.append("Education:")
+        lines += [f"- {', '.join(str(v) for v in entry.values() if v)}" for entry in profile["education"]]
+    return "\n".join(lines)
+
+# Function to extract a profile from the resume text, or from the page images when no text is available
+def extract_profile(resume_text=None, pdf_content=(), use_cache=True):
+    resume_parts = [f"Resume:\n{resume_text}"] if resume_text else list(pdf_content)
+    response_text = generate_content_cached("extract", [PROFILE_PROMPT] + resume_parts, use_cache)
+    return normalize_profile(parse_json_response(response_text))
+
+# Function to locate the stored profile for a resume
+def profile_path(resume_key, cache_dir=RESUME_CACHE_DIR):
+    return os.path.join(cache_dir, "profiles", f"{resume_key}.json")
+
+# Function to get the profile for a resume, extracting it only once per resume hash
+def get_resume_profile(resume_key, resume_text=None, pdf_content=(), use_cache=True, cache_dir=RESUME_CACHE_DIR):
+    """
+    Load the stored profile for a resume or extract and store it.
+
+    Args:
+        resume_key (str): Resume hash, see resai.pdf.resume_cache_key
+        resume_text (str): Complete extracted resume text (preferred input)
+        pdf_content (list): Page image parts, used when there is no text
+        use_cache (bool): False to re-extract and overwrite the stored profile
+
+    Returns:
+        dict: Normalized profile (see PROFILE_PROMPT for the fields)
+    """
+    path = profile_path(resume_key, cache_dir)
+    if use_cache:
+        try:
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("version") == PROFILE_VERSION:
+                return stored["profile"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    profile = extract_profile(resume_text, pdf_content, use_cache)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{time.time_ns()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": PROFILE_VERSION, "created": time.time(), "profile": profile}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Profile cache write skipped: {e}")
+    return profile
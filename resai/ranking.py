@@ -0,0 +1,162 @@
+"""
+Multi-job-description ranking: one processed resume scored against many job descriptions.
+"""
+import csv
+import io
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .config import RANK_MAX_WORKERS, RANK_SEPARATOR, RANK_TOP_K
+from .jobs import report_partial, report_progress
+from .llm import generate_feature_response, parse_percentage
+from .metrics import in_current_context, stage
+from .prompts import RANKING_PROMPT
+from .scoring import local_match_score
+
+# CSV columns read as the job description and as its name, first match wins (case-insensitive)
+CSV_TEXT_COLUMNS = ("description", "job_description", "job description", "text", "content")
+CSV_NAME_COLUMNS = ("title", "job_title", "job title", "name", "position")
+
+# Function to name a job description after its first non-empty line
+def job_name(text, default):
+    for line in text.splitlines():
+        line = line.strip().strip("#*").strip()
+        if line:
+            return line[:80]
+    return default
+
+# Function to split pasted text into job descriptions on separator lines
+def split_job_descriptions(text, separator=RANK_SEPARATOR, source="Pasted"):
+    parts = re.split(rf"^[ \t]*{re.escape(separator)}[ \t]*$", text, flags=re.MULTILINE)
+    jobs = []
+    for part in parts:
+        if part.strip():
+            jobs.append({"name": job_name(part, f"{source} #{len(jobs) + 1}"), "text": part.strip()})
+    return jobs
+
+# Function to read job descriptions from a CSV file with a description column and an optional title column
+def read_job_csv(data, source="CSV"):
+    text = data.decode("utf-8-sig", errors="replace") if isinstance(data, bytes) else data
+    reader = csv.DictReader(io.StringIO(text))
+    columns = {name.strip().lower(): name for name in reader.fieldnames or ()}
+    text_column = next((columns[c] for c in CSV_TEXT_COLUMNS if c in columns), None)
+    if text_column is None:
+        raise ValueError(f"{source} has no job description column "
+                         f"(expected one of: {', '.join(CSV_TEXT_COLUMNS)})")
+    name_column = next((columns[c] for c in CSV_NAME_COLUMNS if c in columns), None)
+    jobs = []
+    for row in reader:
+        description = (row.get(text_column) or "").strip()
+        if description:
+            name = (row.get(name_column) or "").strip() if name_column else ""
+            jobs.append({"name": name or job_name(description, f"{source} row {reader.line_num}"),
+                         "text": description})
+    return jobs
+
+# Function to collect job descriptions from uploaded files and pasted text
+def load_job_descriptions(files=(), pasted="", separator=RANK_SEPARATOR):
+    """
+    Args:
+        files (list): (filename, bytes) pairs; .csv files are read by column, any
+            other file is read as text and split on separator lines
+        pasted (str): Job descriptions separated by lines holding only the separator
+        separator (str): Separator line between pasted job descriptions
+
+    Returns:
+        list: Dicts with 'name' and 'text'
+
+    Raises:
+        ValueError: If a CSV file has no job description column
+    """
+    jobs = []
+    for filename, data in files:
+        if filename.lower().endswith(".csv"):
+            jobs += read_job_csv(data, filename)
+        else:
+            jobs += split_job_descriptions(data.decode("utf-8", errors="replace"), separator, filename)
+    return jobs + split_job_descriptions(pasted, separator)
+
+# Function to find the text after a "Label:" line in a response
+def labelled_line(lines, label):
+    for line in lines:
+        head, _, rest = line.lstrip("0123456789.*- ").partition(":")
+        if rest and head.strip("* ").lower() == label:
+            return rest.strip(" *")
+    return ""
+
+# Function to run the short ranking prompt for one job description
+def analyze_job_fit(job, pdf_content, resume_text=None, profile_text=None, use_cache=True):
+    with stage("rank_job"):
+        response = generate_feature_response(RANKING_PROMPT, pdf_content, job["text"], use_cache,
+                                             resume_text=resume_text, profile_text=profile_text,
+                                             prefer_profile=True)
+    lines = [line.strip() for line in response.strip().splitlines() if line.strip()]
+    return {
+        "match_percentage": parse_percentage(response),
+        "verdict": labelled_line(lines, "verdict"),
+        "gaps": labelled_line(lines, "gaps"),
+    }
+
+# Function to number rows best first: the shortlist by match percentage (failed or pending analyses last), then the rest
+def ranked_rows(rows, shortlist, rest):
+    analyzed = sorted(shortlist, reverse=True,
+                      key=lambda i: -1 if rows[i]["match_percentage"] is None else rows[i]["match_percentage"])
+    return [{"rank": rank, **rows[i]} for rank, i in enumerate(analyzed + rest, 1)]
+
+# Function to rank many job descriptions against one processed resume
+def rank_job_descriptions(jobs, resume_text, pdf_content=(), prompt_resume_text=None, profile_text=None,
+                          top_k=RANK_TOP_K, max_workers=RANK_MAX_WORKERS, use_cache=True):
+    """
+    Score every job description locally, then analyze the best ones with Gemini.
+
+    The local match score (see resai.scoring) is computed for every job
+    description; only the top_k are sent to Gemini, concurrently, and ranked by
+    their match percentage ahead of the rest. Inside a background job the rows
+    are published as a partial result after every analysis, in the same shape
+    with a provisional rank, and a cancel stops the remaining analyses.
+
+    Args:
+        jobs (list): Dicts with 'name' and 'text' (see load_job_descriptions)
+        resume_text (str): Extracted resume text, used for the local score
+        pdf_content (list): Resume page image parts, sent when no prompt text is given
+        prompt_resume_text (str): Complete resume text sent to Gemini instead of the images
+        profile_text (str): Compact candidate profile, sent instead of the text or images
+        top_k (int): Job descriptions analyzed by Gemini
+        max_workers (int): Maximum concurrent Gemini requests
+        use_cache (bool): False to bypass the Gemini response cache
+
+    Returns:
+        list: One row per job description, best first, with 'rank', 'job',
+        'local_score', and 'match_percentage', 'verdict', 'gaps' and 'error'
+        (None unless it was analyzed)
+    """
+    with stage("rank_local", jobs=len(jobs)):
+        rows = [{"job": job["name"], "local_score": local_match_score(resume_text, job["text"])["score"],
+                 "match_percentage": None, "verdict": None, "gaps": None, "error": None}
+                for job in jobs]
+    order = sorted(range(len(jobs)), key=lambda i: rows[i]["local_score"], reverse=True)
+    shortlist = order[:max(0, top_k)]
+    rest = order[len(shortlist):]
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        pending = {
+            executor.submit(in_current_context(analyze_job_fit), jobs[i], pdf_content, prompt_resume_text,
+                            profile_text, use_cache): i
+            for i in shortlist
+        }
+        finished = 0
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    rows[i].update(future.result())
+                except Exception as e:
+                    rows[i]["error"] = str(e)
+                finished += 1
+            report_progress(finished, len(shortlist), f"{finished} of {len(shortlist)} job descriptions analyzed")
+            report_partial(ranked_rows(rows, shortlist, rest))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return ranked_rows(rows, shortlist, rest)
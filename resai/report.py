@@ -0,0 +1,122 @@
+"""
+Full report: every feature prompt run concurrently against one processed resume, combined into one document.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .config import REPORT_MAX_WORKERS
+from .jobs import report_partial, report_progress
+from .llm import generate_feature_response, parse_percentage
+from .metrics import in_current_context, stage
+from .prompts import FEATURE_PROMPTS
+
+# Section titles in report order
+REPORT_SECTIONS = {
+    "analysis": "Resume Analysis",
+    "suggestions": "Optimization Suggestions",
+    "cover_letter": "Cover Letter",
+    "interview_prep": "Interview Preparation Guide",
+    "market_position": "Market Position Analysis",
+    "skill_development": "Skill Development Plan",
+}
+
+# Function to run one report section, timing it as its own stage
+def run_section(feature, prompt, pdf_content, job_desc, resume_text, use_cache, profile_text=None):
+    with stage(f"report:{feature}"):
+        return generate_feature_response(prompt, pdf_content, job_desc, use_cache, resume_text=resume_text,
+                                         profile_text=profile_text)
+
+# Function to run feature prompts concurrently, yielding each result as soon as it completes
+def iter_report_sections(pdf_content, job_desc, resume_text=None, prompts=None, max_workers=REPORT_MAX_WORKERS,
+                         use_cache=True, profile_text=None):
+    """
+    Dispatch every feature prompt at once against the same resume.
+
+    At most max_workers requests are outstanding at a time (on top of the
+    shared Gemini client's own limits), so the total wall time approaches the
+    slowest call rather than the sum of all calls. A failed section does not
+    stop the others.
+
+    Args:
+        pdf_content (list): Resume page image parts
+        job_desc (str): Job description
+        resume_text (str): Complete extracted resume text, sent instead of the images
+        prompts (dict): Feature name -> prompt (default: resai.prompts.FEATURE_PROMPTS)
+        max_workers (int): Maximum concurrent feature requests
+        use_cache (bool): False to bypass the Gemini response cache
+        profile_text (str): Compact candidate profile, sent instead of the images when there is no resume text
+
+    Yields:
+        tuple: (feature, response_text, error) in completion order; exactly one of
+        response_text and error is None
+    """
+    prompts = FEATURE_PROMPTS if prompts is None else prompts
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        pending = {
+            executor.submit(in_current_context(run_section), feature, prompt, pdf_content, job_desc, resume_text,
+                            use_cache, profile_text): feature
+            for feature, prompt in prompts.items()
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                feature = pending.pop(future)
+                try:
+                    yield feature, future.result(), None
+                except Exception as e:
+                    yield feature, None, str(e)
+    finally:
+        # A consumer that stops early (e.g. a Streamlit rerun) leaves queued sections unsent
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# Function to run a full report, publishing each section as it completes (for use as a background job)
+def run_report(pdf_content, job_desc, resume_text=None, prompts=None, max_workers=REPORT_MAX_WORKERS,
+               use_cache=True, profile_text=None):
+    """
+    Collect every section of iter_report_sections. Inside a background job the
+    sections finished so far are published as the partial result
+    ({"responses": ..., "errors": ...}) and a cancel stops the remaining sections.
+
+    Returns:
+        tuple: (responses, errors) dicts keyed by feature name
+    """
+    prompts = FEATURE_PROMPTS if prompts is None else prompts
+    responses = {}
+    errors = {}
+    sections = iter_report_sections(pdf_content, job_desc, resume_text, prompts, max_workers, use_cache,
+                                    profile_text)
+    try:
+        for feature, response, error in sections:
+            if error is not None:
+                errors[feature] = error
+            else:
+                responses[feature] = response
+            report_progress(len(responses) + len(errors), len(prompts),
+                            f"{len(responses) + len(errors)} of {len(prompts)} sections ready")
+            report_partial({"responses": dict(responses), "errors": dict(errors)})
+    finally:
+        sections.close()
+    return responses, errors
+
+# Function to combine report sections into one markdown document
+def build_report_document(responses, errors=None):
+    """
+    Args:
+        responses (dict): Feature name -> response text
+        errors (dict): Feature name -> error message for failed sections
+
+    Returns:
+        str: Markdown report with the sections in REPORT_SECTIONS order
+    """
+    errors = errors or {}
+    document = "# ResAi Report\n\n"
+    if "analysis" in responses:
+        document += f"**Match with Job Description:** {parse_percentage(responses['analysis'])}%\n\n"
+    order = list(REPORT_SECTIONS) + [f for f in {**responses, **errors} if f not in REPORT_SECTIONS]
+    for feature in order:
+        if feature in responses:
+            document += f"## {REPORT_SECTIONS.get(feature, feature)}\n\n{responses[feature].strip()}\n\n"
+        elif feature in errors:
+            document += f"## {REPORT_SECTIONS.get(feature, feature)}\n\n"
+            document += f"_This section could not be generated: {errors[feature]}_\n\n"
+    return document
@@ -0,0 +1,85 @@
+"""
+Local, LLM-free resume to job description match scoring.
+"""
+import re
+
+import numpy as np
+
+# Words ignored by the local match score
+MATCH_STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do does
+each either etc for from has have having he her his how i if in into is it its may me more most must
+my no not of on or our ours out over own per plus preferred required responsibilities role should so
+some such than that the their them then there these they this those through to under up us using
+via was we well were what when where which while who will with within work would you your years year
+ability able experience strong excellent knowledge understanding skills skill team teams including
+candidate candidates job position company looking ideal new other e.g i.e
+""".split())
+MATCH_MAX_TERMS = 40
+
+# Function to tokenize text for local matching, keeping tokens like c++, c#, node.js
+def match_tokens(text):
+    tokens = re.findall(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]", text.lower())
+    return [token for token in tokens if token not in MATCH_STOPWORDS]
+
+# Function to count unigram and bigram terms in a text; bigrams never span punctuation or line breaks
+def match_terms(text):
+    counts = {}
+    for phrase in re.split(r"[,;:()\[\]|•\n]|\.\s", text):
+        tokens = match_tokens(phrase)
+        for term in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            counts[term] = counts.get(term, 0) + 1
+    return counts
+
+# Function to score a resume against a job description locally, without any LLM call
+def local_match_score(resume_text, job_desc, max_terms=MATCH_MAX_TERMS):
+    """
+    Compute an instant, deterministic match score from term overlap.
+
+    The job description's most salient terms (unigrams and bigrams, weighted
+    by log term frequency, bigrams boosted) are checked against the resume,
+    giving a weighted coverage; this is blended with the cosine similarity of
+    the two documents' log-TF vectors. Cheap enough to run
+    on every rerun, and usable to gate expensive LLM calls.
+
+    Args:
+        resume_text (str): Extracted resume text
+        job_desc (str): Job description
+        max_terms (int): Number of job description terms used for coverage
+
+    Returns:
+        dict: 'score' (0-100), 'coverage' (list of per-term dicts with 'term',
+        'weight', 'resume_count' and 'matched') and 'cosine' (0-1)
+    """
+    jd_counts = match_terms(job_desc)
+    resume_counts = match_terms(resume_text)
+    if not jd_counts or not resume_counts:
+        return {"score": 0, "coverage": [], "cosine": 0.0}
+
+    # Salient job description terms; bigrams (multi-word skills) count for more
+    jd_terms = list(jd_counts)
+    jd_tf = np.array([jd_counts[t] for t in jd_terms], dtype=float)
+    is_bigram = np.array([" " in t for t in jd_terms])
+    weights = (1 + np.log(jd_tf)) * np.where(is_bigram, 1.25, 1.0)
+    top = np.argsort(-weights, kind="stable")[:max_terms]
+    top_terms = [jd_terms[i] for i in top]
+    top_weights = weights[top]
+
+    resume_tf = np.array([resume_counts.get(t, 0) for t in top_terms], dtype=float)
+    # A bigram missing as a phrase still earns half credit when both of its words appear
+    partial = np.array([" " in t and all(w in resume_counts for w in t.split(" ")) for t in top_terms])
+    credit = np.where(resume_tf > 0, 1.0, np.where(partial, 0.5, 0.0))
+    coverage_score = float(np.sum(top_weights * credit) / np.sum(top_weights))
+
+    # Cosine similarity of log-TF vectors over the shared vocabulary
+    vocabulary = list(set(jd_counts) | set(resume_counts))
+    jd_vec = np.log1p(np.array([jd_counts.get(t, 0) for t in vocabulary], dtype=float))
+    resume_vec = np.log1p(np.array([resume_counts.get(t, 0) for t in vocabulary], dtype=float))
+    cosine = float(jd_vec @ resume_vec / (np.linalg.norm(jd_vec) * np.linalg.norm(resume_vec)))
+
+    coverage = [
+        {"term": term, "weight": round(float(weight), 2), "resume_count": int(count), "matched": count > 0}
+        for term, weight, count in zip(top_terms, top_weights, resume_tf)
+    ]
+    score = int(round(100 * (0.8 * coverage_score + 0.2 * cosine)))
+    return {"score": max(0, min(100, score)), "coverage": coverage, "cosine": cosine}
@@ -0,0 +1,432 @@
+"""
+Personalized job search: Tavily client, passage trimming, local pre-ranking, relevance scoring and ranked results.
+"""
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .config import (
+    RELEVANCE_MAX_WORKERS,
+    RELEVANCE_MODE,
+    SEARCH_PASSAGE_CHARS,
+    SEARCH_RELEVANCE_TOP_K,
+    SEARCH_SNIPPET_CHARS,
+    TAVILY_API_URL,
+    TAVILY_CACHE_MAX_ENTRIES,
+    TAVILY_CACHE_TTL,
+    TAVILY_CONNECT_TIMEOUT,
+    TAVILY_READ_TIMEOUT,
+    TAVILY_RETRIES,
+    TAVILY_RETRY_STATUSES,
+)
+from .jobs import report_progress
+from .llm import generate_content_cached, parse_json_response, parse_percentage
+from .metrics import in_current_context, stage
+from .scoring import match_terms, match_tokens
+
+# Function to split page text into passages of at most `size` characters, on sentence and line breaks
+def split_passages(text, size=SEARCH_PASSAGE_CHARS):
+    passages = []
+    for block in re.split(r"\n|(?<=[.!?])\s+", text):
+        block = " ".join(block.split())
+        # Long runs without sentence breaks are cut at word boundaries
+        while len(block) > size:
+            cut = block.rfind(" ", 0, size)
+            cut = cut if cut > 0 else size
+            passages.append(block[:cut])
+            block = block[cut:].strip()
+        if block:
+            passages.append(block)
+    return passages
+
+# Function to keep the passages of a page that mention the most terms, within a character budget
+def extract_passages(text, terms, budget=SEARCH_SNIPPET_CHARS):
+    """
+    Trim page text to its most relevant passages, without any LLM call.
+
+    Passages are ranked by how many distinct terms (see resai.scoring.match_tokens)
+    they contain, earlier passages first on ties, and picked until the budget is
+    spent; the picked passages are returned in page order, joined by an ellipsis.
+    """
+    passages = split_passages(text, min(budget, SEARCH_PASSAGE_CHARS))
+    if sum(len(passage) + 1 for passage in passages) <= budget:
+        return " ".join(passages)
+    terms = set(terms)
+    ranked = sorted(range(len(passages)), key=lambda i: (-len(terms.intersection(match_tokens(passages[i]))), i))
+    picked = []
+    used = 0
+    for i in ranked:
+        if used + len(passages[i]) > budget:
+            continue
+        picked.append(i)
+        used += len(passages[i]) + 3
+    return " … ".join(passages[i] for i in sorted(picked))
+
+# Function to measure which of the candidate's skills a page mentions
+def skill_overlap(skills, text):
+    """Return (score 0-100, matched skills): the share of skills whose terms all appear in the text."""
+    if not skills:
+        return 0, []
+    text_terms = match_terms(text)
+    matched = []
+    for skill in skills:
+        tokens = match_tokens(skill)
+        if tokens and (" ".join(tokens) in text_terms or all(token in text_terms for token in tokens)):
+            matched.append(skill)
+    return int(round(100 * len(matched) / len(skills))), matched
+
+# Function to analyze the relevance of a single job to the candidate's skills
+def analyze_job_relevance(resume_skills, job, use_cache=True):
+    relevance_prompt = f"""
+    Analyze the relevance of this job to the candidate's profile:
+    
+    Candidate Skills: {resume_skills}
+    Job Title: {job['title']}
+    Job Description: {job['snippet']}
+    
+    Provide:
+    1. Relevance Score (0-100%)
+    2. Key Matching Skills
+    3. Potential Fit Commentary
+    """
+    try:
+        relevance_analysis = generate_content_cached("score", [relevance_prompt], use_cache)
+        return {"score": parse_percentage(relevance_analysis), "analysis": relevance_analysis}
+    except Exception as e:
+        return {"score": None, "analysis": f"Relevance analysis failed: {str(e)}"}
+
+# Function to score all jobs in one structured prompt
+def batch_job_relevance(resume_skills, jobs, use_cache=True):
+    jobs_text = ""
+    for idx, job in enumerate(jobs, 1):
+        jobs_text += f"Job {idx}\nJob Title: {job['title']}\nJob Description: {job['snippet']}\n\n"
+    batch_prompt = f"""
+    Analyze the relevance of each job below to the candidate's profile.
+    
+    Candidate Skills: {resume_skills}
+    
+    {jobs_text}
+    Respond with only a JSON array containing one object per job, in the same order:
+    [{{"job": 1, "score": <relevance score 0-100>, "matching_skills": ["..."], "commentary": "<potential fit commentary>"}}]
+    """
+    entries = parse_json_response(generate_content_cached("score", [batch_prompt], use_cache))
+    by_job = {int(entry["job"]): entry for entry in entries}
+    relevance = []
+    for idx in range(1, len(jobs) + 1):
+        entry = by_job[idx]
+        score = max(0, min(100, int(entry["score"])))
+        analysis = (
+            f"1. Relevance Score: {score}%\n"
+            f"2. Key Matching Skills: {', '.join(entry.get('matching_skills', []))}\n"
+            f"3. Potential Fit Commentary: {entry.get('commentary', '')}"
+        )
+        relevance.append({"score": score, "analysis": analysis})
+    return relevance
+
+# Function to score the relevance of every job result
+def score_job_relevance(resume_skills, jobs, mode=RELEVANCE_MODE, max_workers=RELEVANCE_MAX_WORKERS, use_cache=True):
+    """
+    Score how relevant each job is to the candidate's skills.
+
+    Args:
+        resume_skills (str): Comma-separated candidate skills
+        jobs (list): Dicts with 'title' and 'snippet'
+        mode (str): "batch" scores every job in one structured prompt,
+            "concurrent" sends one prompt per job in parallel
+        max_workers (int): Maximum concurrent relevance requests
+        use_cache (bool): False to bypass the Gemini response cache
+
+    Returns:
+        list: Dicts with 'score' (0-100, None if scoring failed) and 'analysis',
+        in the same order as jobs
+    """
+    if not jobs:
+        return []
+    if mode == "batch":
+        try:
+            return batch_job_relevance(resume_skills, jobs, use_cache)
+        except Exception as e:
+            # Malformed or incomplete batch output: score each job on its own instead
+            print(f"Batch relevance scoring failed, falling back to concurrent: {e}")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        return list(executor.map(in_current_context(lambda job: analyze_job_relevance(resume_skills, job, use_cache)),
+                                 jobs))
+
+# Error raised when the Tavily API answers with a non-200 status
+class TavilyError(Exception):
+    def __init__(self, status_code, text):
+        super().__init__(f"Tavily Search API error: {status_code}")
+        self.status_code = status_code
+        self.text = text
+
+# Tavily Search client with connection pooling, retries and a result cache
+class TavilyClient:
+    """
+    Pooled client for the Tavily Search API.
+
+    A persistent requests.Session keeps connections alive between searches.
+    Connection errors, timeouts, 429 and 5xx responses are retried with
+    jittered exponential backoff, and identical searches are served from an
+    in-memory TTL cache shared by every session in the process.
+    """
+
+    def __init__(self, api_key, base_url=TAVILY_API_URL, timeout=(TAVILY_CONNECT_TIMEOUT, TAVILY_READ_TIMEOUT),
+                 retries=TAVILY_RETRIES, cache_ttl=TAVILY_CACHE_TTL, cache_max_entries=TAVILY_CACHE_MAX_ENTRIES):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def search(self, query, include_domains=(), max_results=5, search_depth="advanced",
+               include_raw_content=True, use_cache=True):
+        """
+        Run a Tavily search and return the parsed JSON response.
+
+        Raises:
+            TavilyError: If the API answers with a non-200 status after all retries
+            requests.RequestException: If the API cannot be reached after all retries
+        """
+        key = json.dumps([query, sorted(include_domains), max_results, search_depth, include_raw_content])
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+        payload = {
+            "api_key": self.api_key,
+            "query": query,
+            "search_depth": search_depth,
+            "include_domains": list(include_domains),
+            "max_results": max_results,
+            "include_raw_content": include_raw_content
+        }
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                with stage("tavily_search", attempt=attempt) as record:
+                    response = self.session.post(f"{self.base_url}/search", json=payload, timeout=self.timeout)
+                    record["status"] = response.status_code
+                    record["bytes"] = len(response.content)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code == 200:
+                    results = response.json()
+                    self._cache_put(key, results)
+                    return results
+                if response.status_code not in TAVILY_RETRY_STATUSES or attempt == self.retries:
+                    raise TavilyError(response.status_code, response.text)
+                retry_after = response.headers.get("Retry-After")
+            time.sleep(self._backoff(attempt, retry_after))
+
+    def _backoff(self, attempt, retry_after=None):
+        # Honour a numeric Retry-After, otherwise full jitter; either way never wait more than 30s
+        if retry_after is not None and retry_after.isdigit():
+            return min(30.0, float(retry_after))
+        return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.time() - stored_at > self.cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return results
+
+    def _cache_put(self, key, results):
+        with self._lock:
+            self._cache[key] = (time.time(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+
+# Function to get the process-wide Tavily client, so connections and cached results survive reruns
+@functools.lru_cache(maxsize=None)
+def get_tavily_client(api_key):
+    return TavilyClient(api_key)
+
+# Function to search for jobs matching the resume and return structured, ranked results
+def search_jobs(resume_text, job_desc_input, count=5, use_cache=True, profile=None, top_k=SEARCH_RELEVANCE_TOP_K,
+                snippet_chars=SEARCH_SNIPPET_CHARS, api_key=None):
+    """
+    Search Tavily for jobs, trim each page to its relevant passages and rank the results.
+
+    Results are pre-ranked locally by how many of the candidate's skills each
+    page mentions; only the top_k are scored by Gemini, on their trimmed
+    snippets, and ranked by that score ahead of the remaining results.
+
+    Args:
+        resume_text (str): Extracted text from the user's resume
+        job_desc_input (str): Job description or target role
+        count (int): Number of search results to retrieve
+        use_cache (bool): False to bypass the Gemini response and search result caches
+        profile (dict): Structured resume profile (see resai.profile); its skills
+            replace the separate skills extraction call
+        top_k (int): Results sent to Gemini relevance scoring
+        snippet_chars (int): Character budget of each result's trimmed snippet
+        api_key (str): Tavily API key (default: TAVILY_API_KEY)
+
+    Returns:
+        dict: 'query', 'skills' (list) and 'jobs', most relevant first; each job
+        has 'title', 'link', 'snippet' (trimmed), 'content' (full page text),
+        'local_score' (0-100), 'matching_skills', and 'score' and 'analysis'
+        (None unless it was scored by Gemini)
+
+    Raises:
+        ValueError: If no Tavily API key is configured
+        TavilyError: If the Tavily API answers with an error
+    """
+    api_key = api_key or os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise ValueError("Tavily API key is missing")
+
+    # Use Gemini to extract key context for search; skills and title are independent, so run both at once
+    skills_prompt = f"""
+    Extract the top 10 most relevant professional skills from this resume:
+    {resume_text}
+    Return as a comma-separated list of skills.
+    """
+    title_prompt = f"""
+    Extract the exact job title and 3-5 most critical requirements from this job description:
+    {job_desc_input}
+    
+    Format your response as:
+    Job Title: [Exact Job Title]
+    Key Requirements: 
+    1. [Requirement 1]
+    2. [Requirement 2]
+    3. [Requirement 3]
+    """
+    report_progress(0, 3, "Extracting skills and job title")
+    if profile is not None and profile.get("skills"):
+        resume_skills = ", ".join(profile["skills"][:10])
+        job_context = generate_content_cached("extract", [title_prompt], use_cache).strip()
+    else:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            skills_future = executor.submit(in_current_context(generate_content_cached), "extract",
+                                            [skills_prompt], use_cache)
+            title_future = executor.submit(in_current_context(generate_content_cached), "extract",
+                                           [title_prompt], use_cache)
+            resume_skills = skills_future.result().strip()
+            job_context = title_future.result().strip()
+    skills = [skill.strip() for skill in resume_skills.split(",") if skill.strip()]
+
+    # Extract job title
+    job_title = job_context.split('Job Title:')[1].split('\n')[0].strip()
+
+    # Construct search query
+    search_query = f'"{job_title}" jobs {" ".join(resume_skills.split(",")[:3])} hiring now'
+
+    # Perform the search
+    report_progress(1, 3, "Searching job boards")
+    search_results = get_tavily_client(api_key).search(
+        search_query,
+        include_domains=[
+            "linkedin.com",
+            "indeed.com", 
+            "glassdoor.com", 
+            "monster.com"
+        ],
+        max_results=count,
+        search_depth="advanced",
+        include_raw_content=True,
+        use_cache=use_cache
+    )
+
+    # Keep only the passages about the candidate's skills and the role, and pre-rank by skill overlap
+    terms = set(match_tokens(f"{resume_skills} {job_title}"))
+    jobs = []
+    with stage("search_trim", results=len(search_results.get('results', []))):
+        for result in search_results.get('results', []):
+            content = result.get('raw_content') or result.get('content') or 'No description available'
+            local_score, matching_skills = skill_overlap(skills, content)
+            jobs.append({
+                "title": result.get('title') or 'Untitled Job',
+                "link": result.get('url') or '#',
+                "snippet": extract_passages(content, terms, snippet_chars),
+                "content": content,
+                "local_score": local_score,
+                "matching_skills": matching_skills,
+                "score": None,
+                "analysis": None
+            })
+    jobs.sort(key=lambda job: job["local_score"], reverse=True)
+
+    # Analyze job relevance for the top results at once, then rank them by score (unscored jobs last)
+    report_progress(2, 3, f"Scoring the top {min(top_k, len(jobs))} results")
+    shortlist = jobs[:max(0, top_k)]
+    for job, job_relevance in zip(shortlist, score_job_relevance(resume_skills, shortlist, use_cache=use_cache)):
+        job.update(job_relevance)
+    shortlist.sort(key=lambda job: job["score"] if job["score"] is not None else -1, reverse=True)
+    report_progress(3, 3, "Done")
+    return {"query": search_query, "skills": skills, "jobs": shortlist + jobs[len(shortlist):]}
+
+# Function to format structured job search results as markdown
+def format_job_results(results):
+    markdown_results = "## 🔍 Personalized Job Search Results\n\n"
+    for idx, job in enumerate(results["jobs"], 1):
+        markdown_results += f"### {idx}. {job['title']}\n\n"
+        markdown_results += f"**Link:** [{job['link']}]({job['link']})\n\n"
+        markdown_results += f"**Description:** {job['snippet']}\n\n"
+        matching_skills = ", ".join(job["matching_skills"]) or "none"
+        markdown_results += f"**Skill Overlap:** {job['local_score']}% ({matching_skills})\n\n"
+        if job["analysis"] is not None:
+            markdown_results += f"**Relevance Analysis:**\n{job['analysis']}\n\n"
+        markdown_results += "---\n\n"
+    return markdown_results
+
+# Function to search using Perplexity API with improved robustness and flexibility
+def tavily_job_search(resume_text, job_desc_input, count=5, use_cache=True, profile=None):
+    """
+    Perform a job search using Tavily Search API
+    
+    Args:
+        resume_text (str): Extracted text from the user's resume
+        job_desc_input (str): Job description or target role
+        count (int): Number of search results to retrieve
+        use_cache (bool): False to bypass the Gemini response and search result caches
+        profile (dict): Structured resume profile (see resai.profile); its skills
+            replace the separate skills extraction call
+    
+    Returns:
+        str: Markdown-formatted job search results, most relevant first (see search_jobs)
+    """
+    # Retrieve Tavily API key from environment variables
+    tavily_api_key = os.getenv("TAVILY_API_KEY")
+    
+    if not tavily_api_key:
+        return "❌ Error: Tavily API key is missing"
+    
+    try:
+        results = search_jobs(resume_text, job_desc_input, count, use_cache, profile, api_key=tavily_api_key)
+    except TavilyError as e:
+        return f"❌ Tavily Search API error: {e.status_code}\n{e.text}"
+    except Exception as e:
+        return f"❌ Comprehensive search error: {str(e)}"
+    
+    # Check if results exist
+    if not results["jobs"]:
+        return "❌ No job results found"
+    
+    return format_job_results(results)
@@ -0,0 +1,135 @@
+"""
+Shared Gemini client: token buckets, priority admission, quota fallback and token usage, with fake models.
+"""
+import threading
+import time
+import types
+
+import pytest
+
+from resai import gemini
+from resai.gemini import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, GeminiClient, ModelRouter, TokenBucket
+from resai.metrics import start_run
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+# Stand-in for genai.GenerativeModel: answers "ok", or raises the given error
+class FakeModel:
+    def __init__(self, error=None, usage=True):
+        self.error = error
+        self.usage = usage
+        self.calls = 0
+
+    def generate_content(self, contents, stream=False):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        usage = types.SimpleNamespace(prompt_token_count=10, candidates_token_count=20, total_token_count=30)
+        return types.SimpleNamespace(text="ok", usage_metadata=usage if self.usage else None)
+
+    def count_tokens(self, contents):
+        return types.SimpleNamespace(total_tokens=7 * len(contents))
+
+
+def fake_client(models, **kwargs):
+    client = GeminiClient(router=ModelRouter(routes={"generate": tuple(models)}, cooldown=60), **kwargs)
+    client.model = models.__getitem__
+    return client
+
+
+# Clock for TokenBucket, advanced by hand
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_its_per_minute_rate(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(gemini.time, "monotonic", clock)
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    # Amounts above capacity wait for a full bucket instead of forever
+    assert bucket.wait_time(1000) == pytest.approx(59.5)
+    clock.now += 1000
+    assert bucket.wait_time(60) == 0
+
+
+def test_token_bucket_adjust_can_go_negative(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(gemini.time, "monotonic", clock)
+    bucket = TokenBucket(60)
+    bucket.take(60)
+    bucket.adjust(30)
+    assert bucket.level == pytest.approx(-30)
+    assert bucket.wait_time(1) == pytest.approx(31.0)
+
+
+def test_interactive_calls_are_admitted_before_background_ones():
+    client = GeminiClient(max_in_flight=1, router=ModelRouter(routes={}))
+    client._acquire(PRIORITY_INTERACTIVE, 1, "m")
+    admitted = []
+
+    def call(priority):
+        client._acquire(priority, 1, "m")
+        admitted.append(priority)
+        client._release()
+
+    background = threading.Thread(target=call, args=(PRIORITY_BACKGROUND,))
+    background.start()
+    while len(client._waiting) < 1:
+        time.sleep(0.01)
+    interactive = threading.Thread(target=call, args=(PRIORITY_INTERACTIVE,))
+    interactive.start()
+    while len(client._waiting) < 2:
+        time.sleep(0.01)
+    client._release()
+    background.join(5)
+    interactive.join(5)
+    assert admitted == [PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND]
+
+
+def test_quota_error_falls_back_to_the_next_model_without_retrying():
+    models = {"a": FakeModel(QuotaError("429 quota exceeded")), "b": FakeModel()}
+    client = fake_client(models, retries=0)
+    route = {}
+    assert client.generate_content("generate", ["x"], route=route).text == "ok"
+    assert route["model"] == "b"
+    # "a" stays on cooldown, so the next call goes straight to "b"
+    client.generate_content("generate", ["x"])
+    assert (models["a"].calls, models["b"].calls) == (1, 2)
+
+
+def test_quota_error_on_every_model_is_raised():
+    models = {"a": FakeModel(QuotaError("429")), "b": FakeModel(QuotaError("429"))}
+    with pytest.raises(QuotaError):
+        fake_client(models, retries=0).generate_content("generate", ["x"])
+
+
+def test_token_bucket_is_corrected_to_the_reported_usage():
+    client = fake_client({"a": FakeModel()}, model_limits={"a": (60, 1000)})
+    run = start_run("test")
+    client.generate_content("generate", ["x"])
+    tokens = client._model_buckets("a")[1]
+    # Charged the estimate on admission, then corrected to 10 prompt + 20 output tokens
+    assert tokens.level == pytest.approx(970, abs=1)
+    record = run.summary()["stages"][0]
+    assert (record["prompt_tokens"], record["output_tokens"], record["token_source"]) == (10, 20, "usage_metadata")
+
+
+def test_usage_is_counted_when_the_response_has_no_usage_metadata():
+    client = fake_client({"a": FakeModel(usage=False)}, model_limits={"a": (60, 1000)})
+    run = start_run("test")
+    client.generate_content("generate", ["x"])
+    record = next(stage for stage in run.summary()["stages"] if stage["stage"] == "gemini")
+    assert (record["prompt_tokens"], record["output_tokens"], record["token_source"]) == (7, 7, "count_tokens")
+    assert client._model_buckets("a")[1].level == pytest.approx(986, abs=1)
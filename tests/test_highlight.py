@@ -0,0 +1,43 @@
+"""
+Single-pass keyword highlighting and the process-wide keyword memo, with keyword extraction replaced by a fake.
+"""
+from resai import highlight
+from resai.highlight import cached_keywords, highlight_text, profile_keywords
+
+
+def test_symbol_suffixed_tokens_are_not_split():
+    assert highlight_text("C, C# and C++", ["C"]) == "**C**, C# and C++"
+    assert highlight_text("C, C# and C++", ["C#", "C++"]) == "C, **C#** and **C++**"
+    assert profile_keywords({"skills": ["C", "Go"]}, "We use C# and Go.") == ["Go"]
+
+
+def test_longest_keyword_wins_and_highlights_are_not_rematched():
+    text = highlight_text("Machine learning and learning, machine-learning", ["learning", "Machine Learning"])
+    assert text == "**Machine learning** and **learning**, machine-**learning**"
+    assert highlight_text("Python", ["Python", "**Python**"]) == "**Python**"
+
+
+def test_keyword_memo_is_reused_and_replaced_by_a_fresh_generation(monkeypatch):
+    answers = iter([["Bad"], ["Python"]])
+    calls = []
+
+    def fake_extract(job_desc, use_cache=True):
+        calls.append(use_cache)
+        return next(answers)
+
+    monkeypatch.setattr(highlight, "extract_keywords", fake_extract)
+    job_desc = "A job description only this test uses"
+    assert cached_keywords(job_desc) == ["Bad"]
+    assert cached_keywords(job_desc) == ["Bad"]
+    assert cached_keywords(job_desc, use_cache=False) == ["Python"]
+    assert cached_keywords(job_desc) == ["Python"]
+    assert calls == [True, False]
+
+
+def test_keyword_memo_expires_with_the_ttl(monkeypatch):
+    monkeypatch.setattr(highlight, "extract_keywords", lambda job_desc, use_cache=True: [job_desc[:4]])
+    job_desc = "Another job description only this test uses"
+    cached_keywords(job_desc)
+    monkeypatch.setattr(highlight, "extract_keywords", lambda job_desc, use_cache=True: ["New"])
+    assert cached_keywords(job_desc) == ["Anot"]
+    assert cached_keywords(job_desc, ttl=-1) == ["New"]
@@ -0,0 +1,107 @@
+"""
+Background job runner: single-flight deduplication, owners and cancellation, progress and failures.
+"""
+import threading
+
+import pytest
+
+from resai.jobs import JobRunner, check_cancelled, job_key, report_partial, report_progress
+
+
+def test_identical_jobs_attach_to_one_execution():
+    runner = JobRunner(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = runner.submit("double", job_key("double", 21), work, 21, owner="a")
+    second = runner.submit("double", job_key("double", 21), work, 21, owner="b")
+    other = runner.submit("double", job_key("double", 4), work, 4, owner="a")
+    release.set()
+    assert first is second and first is not other
+    assert first.wait(5) and other.wait(5)
+    assert (first.result, other.result) == (42, 8)
+    assert sorted(calls) == [4, 21]
+    assert first.owners == {"a", "b"}
+
+
+def test_job_key_hashes_bytes_and_nested_inputs():
+    assert job_key("op", [b"page"], {"a": 1}) == job_key("op", [b"page"], {"a": 1})
+    assert job_key("op", [b"page"]) != job_key("op", [b"page2"])
+    assert job_key("op", "1") != job_key("op", 1)
+
+
+def test_job_is_cancelled_once_its_last_owner_leaves():
+    runner = JobRunner(max_workers=1)
+    started = threading.Event()
+
+    def work():
+        started.set()
+        while True:
+            check_cancelled()
+            threading.Event().wait(0.01)
+
+    key = job_key("loop")
+    job = runner.submit("loop", key, work, owner="a")
+    runner.submit("loop", key, work, owner="b")
+    assert started.wait(5)
+    runner.cancel(job.id, "a")
+    assert not job.wait(0.1)
+    runner.cancel(job.id, "b")
+    assert job.wait(5)
+    assert job.status == "cancelled"
+    # A new submission with the same inputs starts fresh instead of attaching to the cancelled job
+    assert runner.submit("loop", key, lambda: "again").id != job.id
+
+
+def test_progress_partial_results_and_failures_are_reported():
+    runner = JobRunner(max_workers=1)
+
+    def work():
+        report_progress(1, 2, "half")
+        report_partial("partial text")
+        raise ValueError("broken")
+
+    job = runner.submit("fail", job_key("fail"), work)
+    assert job.wait(5)
+    assert (job.status, job.error) == ("failed", "broken")
+    assert (job.fraction(), job.message, job.partial) == (0.5, "half", "partial text")
+
+
+def test_finished_jobs_are_pruned_after_the_retention():
+    runner = JobRunner(max_workers=1, retention=0)
+    job = runner.submit("quick", job_key("quick"), lambda: 1)
+    assert job.wait(5)
+    runner.submit("other", job_key("other"), lambda: 2)
+    assert runner.get(job.id) is None
+
+
+def test_report_functions_are_no_ops_outside_of_a_job():
+    report_progress(1, 1, "ignored")
+    report_partial("ignored")
+    check_cancelled()
+
+
+def test_job_stages_are_collected_on_the_job():
+    from resai.metrics import stage
+
+    def work():
+        with stage("inside_job"):
+            pass
+
+    job = JobRunner(max_workers=1).submit("staged", job_key("staged"), work)
+    assert job.wait(5)
+    assert [record["stage"] for record in job.stages()] == ["inside_job"]
+
+
+@pytest.mark.parametrize("owner", [None, "a"])
+def test_cancelling_a_finished_job_changes_nothing(owner):
+    runner = JobRunner(max_workers=1)
+    job = runner.submit("done", job_key("done", owner), lambda: "result", owner="a")
+    assert job.wait(5)
+    runner.cancel(job.id, owner)
+    assert (job.status, job.result) == ("done", "result")
@@ -0,0 +1,73 @@
+"""
+Persistent Gemini response cache: TTL, least-recently-used eviction and fallback answers, with a fake client.
+"""
+import functools
+import types
+
+import pytest
+
+from resai import llm
+from resai.llm import generate_content_cached, llm_cache_get, llm_cache_key, llm_cache_put
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm, "llm_cache_connect",
+                        functools.partial(llm.llm_cache_connect, str(tmp_path / "responses.sqlite3")))
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(llm.time, "time", lambda: clock.now)
+    return clock
+
+
+# Stand-in for the shared Gemini client: answers from the given model and counts its calls
+class FakeClient:
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def generate_content(self, model_name, contents, priority=None, retries=None, route=None):
+        self.calls += 1
+        route["model"] = self.model
+        return types.SimpleNamespace(text=f"answer {self.calls} from {self.model}")
+
+
+def test_cache_key_depends_on_model_and_image_bytes():
+    page = {"mime_type": "image/jpeg", "data": b"page"}
+    assert llm_cache_key("m", ["p", page]) == llm_cache_key("m", ["p", dict(page)])
+    assert llm_cache_key("m", ["p", page]) != llm_cache_key("other", ["p", page])
+    assert llm_cache_key("m", ["p", page]) != llm_cache_key("m", ["p", {**page, "data": b"page2"}])
+
+
+def test_entries_expire_after_the_ttl(cache):
+    llm_cache_put("k", "m", "text", ttl=10)
+    assert llm_cache_get("k", ttl=10) == "text"
+    cache.now += 11
+    assert llm_cache_get("k", ttl=10) is None
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for key in ("a", "b"):
+        llm_cache_put(key, "m", key, max_entries=2)
+        cache.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert llm_cache_get("a") == "a"
+    cache.now += 1
+    llm_cache_put("c", "m", "c", max_entries=2)
+    assert [llm_cache_get(key) for key in ("a", "b", "c")] == ["a", None, "c"]
+
+
+def test_primary_model_answers_are_cached(cache, monkeypatch):
+    client = FakeClient(llm.primary_model("generate"))
+    monkeypatch.setattr(llm, "get_gemini_client", lambda: client)
+    first = generate_content_cached("generate", ["prompt"])
+    assert generate_content_cached("generate", ["prompt"]) == first
+    assert generate_content_cached("generate", ["prompt"], use_cache=False) != first
+    assert client.calls == 2
+
+
+def test_fallback_model_answers_are_not_cached(cache, monkeypatch):
+    client = FakeClient("fallback-model")
+    monkeypatch.setattr(llm, "get_gemini_client", lambda: client)
+    generate_content_cached("generate", ["prompt"])
+    generate_content_cached("generate", ["prompt"])
+    assert client.calls == 2
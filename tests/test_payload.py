@@ -0,0 +1,58 @@
+"""
+Feature request payloads: text, profile or images, page shrinking and token budget trimming.
+"""
+import io
+
+from PIL import Image
+
+from resai import payload
+from resai.gemini import estimate_tokens
+from resai.payload import TRUNCATION_MARKER, build_feature_payload, shrink_jpeg, truncate_to_tokens
+
+PAGE = {"mime_type": "image/jpeg", "data": b"jpeg"}
+
+
+def test_resume_text_is_sent_instead_of_images_and_profile():
+    contents = build_feature_payload("Prompt", [PAGE], "Job", "Resume text", profile_text="Profile")
+    assert contents == ["Prompt", "Resume:\nResume text", "Job Description:\nJob"]
+
+
+def test_profile_replaces_images_or_preferred_text():
+    assert build_feature_payload("Prompt", [PAGE], "Job", None, profile_text="Profile")[1] == \
+        "Candidate Profile:\nProfile"
+    assert build_feature_payload("Prompt", [PAGE], "Job", "Resume text", profile_text="Profile",
+                                 prefer_profile=True)[1] == "Candidate Profile:\nProfile"
+
+
+def test_truncate_to_tokens_marks_the_cut():
+    assert truncate_to_tokens("short", 100) == "short"
+    text = truncate_to_tokens("x" * 1000, 50)
+    assert len(text) <= 200 and text.endswith(TRUNCATION_MARKER)
+
+
+def test_text_parts_are_trimmed_to_the_token_budget(monkeypatch):
+    monkeypatch.setattr(payload, "count_tokens", lambda contents, model_name="generate": estimate_tokens(contents))
+    contents = build_feature_payload("Prompt", [], "j" * 4000, "r" * 8000, token_budget=1000)
+    assert estimate_tokens(contents) <= 1000
+    assert contents[1].endswith(TRUNCATION_MARKER) and contents[2].endswith(TRUNCATION_MARKER)
+    # The parts keep their share of the budget
+    assert len(contents[1]) > len(contents[2])
+
+
+def test_requests_under_budget_skip_count_tokens(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("count_tokens should not be called")
+
+    monkeypatch.setattr(payload, "count_tokens", fail)
+    assert build_feature_payload("Prompt", [], "Job", "Resume", token_budget=1000)[1] == "Resume:\nResume"
+
+
+def test_large_pages_are_shrunk_once(monkeypatch):
+    buffer = io.BytesIO()
+    Image.new("RGB", (3000, 2000), "white").save(buffer, format="JPEG")
+    page = buffer.getvalue()
+    small = shrink_jpeg(page, max_side=800, max_bytes=100 * 1024)
+    with Image.open(io.BytesIO(small)) as img:
+        assert max(img.size) == 800
+    monkeypatch.setattr(payload, "recompress_jpeg", lambda *args: b"recompressed again")
+    assert shrink_jpeg(bytes(page), max_side=800, max_bytes=100 * 1024) == small
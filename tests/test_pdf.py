@@ -0,0 +1,58 @@
+"""
+Rasterization page order, with pdf2image replaced by a fake that names files like poppler threads do,
+and the on-disk resume cache.
+"""
+import os
+import sys
+import types
+import uuid
+
+from resai.pdf import iter_pdf_pages, load_cached_resume, store_cached_resume
+from resai.profile import profile_path
+
+
+# Stand-in for pdf2image: one "poppler thread" per page, each with its own random file name prefix
+def fake_pdf2image(page_count):
+    def convert_from_bytes(pdf_bytes, first_page, last_page, thread_count, output_folder, **kwargs):
+        paths = []
+        for page in range(first_page, last_page + 1):
+            path = os.path.join(output_folder, f"{uuid.uuid4()}-{page}.jpg")
+            with open(path, "wb") as f:
+                f.write(f"PAGE{page}".encode())
+            paths.append(path)
+        return paths
+
+    return types.SimpleNamespace(
+        pdfinfo_from_bytes=lambda pdf_bytes: {"Pages": page_count},
+        convert_from_bytes=convert_from_bytes,
+    )
+
+
+def test_pages_keep_document_order_with_several_threads(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pdf2image", fake_pdf2image(6))
+    settings = {"dpi": 72, "fmt": "jpeg", "jpeg_quality": 85, "grayscale": False, "max_pages": 10}
+    for _ in range(20):
+        pages = list(iter_pdf_pages(b"%PDF", settings=settings, thread_count=2))
+        assert pages == [f"PAGE{page}".encode() for page in range(1, 7)]
+
+
+def test_cached_resume_round_trips(tmp_path):
+    store_cached_resume("key", [b"page1", b"page2"], "text", ["ocr", "text-layer"], cache_dir=str(tmp_path))
+    assert load_cached_resume("key", cache_dir=str(tmp_path)) == ([b"page1", b"page2"], "text", ["ocr", "text-layer"])
+    assert load_cached_resume("missing", cache_dir=str(tmp_path)) is None
+
+
+def test_least_recently_used_resumes_and_their_profiles_are_evicted(tmp_path):
+    cache_dir = str(tmp_path)
+    for age, key in enumerate(("new", "old")):
+        store_cached_resume(key, [b"x" * 1000], "text", ["ocr"], cache_dir=cache_dir)
+        os.makedirs(os.path.dirname(profile_path(key, cache_dir)), exist_ok=True)
+        with open(profile_path(key, cache_dir), "w") as f:
+            f.write("{}")
+        # Oldest access first; loading refreshes it
+        os.utime(os.path.join(cache_dir, "resumes", key, "meta.json"), (1000 - age, 1000 - age))
+    with open(profile_path("orphan", cache_dir), "w") as f:
+        f.write("{}")
+    store_cached_resume("third", [b"x" * 1000], "text", ["ocr"], cache_dir=cache_dir, max_bytes=2500)
+    assert sorted(os.listdir(os.path.join(cache_dir, "resumes"))) == ["new", "third"]
+    assert os.listdir(os.path.dirname(profile_path("new", cache_dir))) == ["new.json"]
@@ -0,0 +1,105 @@
+"""
+Batch pipeline: streamed JSONL records, resuming an interrupted run and bounded resumes in memory,
+with resume processing and scoring replaced by fakes.
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from resai import pipeline
+from resai.pipeline import completed_pairs, run_batch
+
+RESUMES = ("a.pdf", "b.pdf", "c.pdf", "d.pdf", "e.pdf", "f.pdf")
+JOBS = ("x.txt", "y.txt")
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    for name in RESUMES:
+        (tmp_path / name).write_bytes(b"%PDF")
+    for name in JOBS:
+        (tmp_path / name).write_text("Python and SQL engineer", encoding="utf-8")
+    monkeypatch.setattr(pipeline, "process_resume_file",
+                        lambda path: (([], "python sql", ["text-layer"]), 0.0))
+    return tmp_path
+
+
+def paths(directory, names):
+    return [os.path.join(str(directory), name) for name in names]
+
+
+def read_records(output):
+    with open(output, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_every_pair_is_written_once_and_each_resume_processed_once(files, monkeypatch):
+    processed = []
+    monkeypatch.setattr(pipeline, "process_resume_file",
+                        lambda path: processed.append(path) or (([], "python sql", ["text-layer"]), 0.0))
+    output = str(files / "results.jsonl")
+    records = []
+    counts = run_batch(paths(files, RESUMES[:2]), paths(files, JOBS), output, features=(), on_record=records.append)
+    assert counts == {"ok": 4, "error": 0, "skipped": 0}
+    assert read_records(output) == records
+    assert {(os.path.basename(r["resume"]), os.path.basename(r["job"])) for r in records} == \
+        {(resume, job) for resume in RESUMES[:2] for job in JOBS}
+    assert sorted(processed) == paths(files, RESUMES[:2])
+
+
+def test_resuming_skips_completed_pairs_whatever_the_path_spelling(files, monkeypatch):
+    output = str(files / "results.jsonl")
+    run_batch(paths(files, ["a.pdf"]), paths(files, JOBS), output, features=())
+    # An interrupted run leaves a partially written last line
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"resume": "')
+    monkeypatch.chdir(files)
+    counts = run_batch(["./a.pdf", "b.pdf"], ["x.txt", os.path.join("..", files.name, "y.txt")], output,
+                       features=())
+    assert counts == {"ok": 2, "error": 0, "skipped": 2}
+    assert len(completed_pairs(output)) == 4
+
+
+def test_failed_pairs_are_recorded_and_run_again(files, monkeypatch):
+    output = str(files / "results.jsonl")
+
+    def failing_score(*args):
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(pipeline, "score_pair", failing_score)
+    assert run_batch(paths(files, ["a.pdf"]), paths(files, ["x.txt"]), output, features=())["error"] == 1
+    assert read_records(output)[0]["error"] == "model down"
+    monkeypatch.setattr(pipeline, "score_pair", lambda *args: {"timings": {}})
+    assert run_batch(paths(files, ["a.pdf"]), paths(files, ["x.txt"]), output, features=())["ok"] == 1
+
+
+def test_at_most_two_resumes_per_pdf_worker_are_held(files, monkeypatch):
+    lock = threading.Lock()
+    state = {"processed": 0, "released": 0, "peak": 0, "pairs": {}}
+
+    def fake_process(path):
+        with lock:
+            state["processed"] += 1
+            state["peak"] = max(state["peak"], state["processed"] - state["released"])
+        return ([], "python sql", ["text-layer"]), 0.0
+
+    def slow_score(*args):
+        time.sleep(0.02)
+        return {"timings": {}}
+
+    def on_record(record):
+        pairs = state["pairs"]
+        pairs[record["resume"]] = pairs.get(record["resume"], 0) + 1
+        if pairs[record["resume"]] == len(JOBS):
+            with lock:
+                state["released"] += 1
+
+    monkeypatch.setattr(pipeline, "process_resume_file", fake_process)
+    monkeypatch.setattr(pipeline, "score_pair", slow_score)
+    counts = run_batch(paths(files, RESUMES), paths(files, JOBS), str(files / "results.jsonl"), features=(),
+                       pdf_workers=1, llm_workers=4, on_record=on_record)
+    assert counts["ok"] == len(RESUMES) * len(JOBS)
+    assert state["peak"] <= 2
@@ -0,0 +1,32 @@
+"""
+Local, LLM-free match score.
+"""
+from resai.scoring import local_match_score, match_terms, match_tokens
+
+JOB_DESC = """Senior Data Engineer
+We are looking for a data engineer with Python, SQL, Apache Spark and C++ experience.
+Machine learning pipelines on AWS are a plus."""
+
+
+def test_tokens_keep_symbols_and_drop_stopwords():
+    assert match_tokens("Experience with C++, C# and Node.js") == ["c++", "c#", "node.js"]
+
+
+def test_bigrams_never_span_punctuation():
+    terms = match_terms("Python, SQL")
+    assert "python sql" not in terms
+    assert terms["python"] == terms["sql"] == 1
+
+
+def test_score_is_deterministic_and_ordered_by_overlap():
+    strong = "Data engineer: Python, SQL, Apache Spark, C++, machine learning pipelines on AWS."
+    weak = "Pastry chef with a passion for sourdough."
+    strong_score = local_match_score(strong, JOB_DESC)
+    assert strong_score == local_match_score(strong, JOB_DESC)
+    assert 0 <= local_match_score(weak, JOB_DESC)["score"] < strong_score["score"] <= 100
+    assert {"term", "weight", "resume_count", "matched"} <= set(strong_score["coverage"][0])
+
+
+def test_empty_inputs_score_zero():
+    assert local_match_score("", JOB_DESC) == {"score": 0, "coverage": [], "cosine": 0.0}
+    assert local_match_score("Python", "")["score"] == 0
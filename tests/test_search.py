@@ -0,0 +1,80 @@
+"""
+Tavily client: retries, Retry-After handling and the result cache, with a fake HTTP session.
+"""
+import json
+import types
+
+import pytest
+
+from resai import search
+from resai.search import TavilyClient, TavilyError
+
+
+# Stand-in for requests.Session: answers with the given (status, headers) in turn
+class FakeSession:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.posts = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.posts += 1
+        status, headers = self.answers.pop(0)
+        return types.SimpleNamespace(status_code=status, headers=headers, content=b"{}", text="",
+                                     json=lambda: {"results": [json["query"]]})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(search.time, "sleep", slept.append)
+    return slept
+
+
+def client_with(answers, **kwargs):
+    client = TavilyClient("key", **kwargs)
+    client.session = FakeSession(answers)
+    return client
+
+
+def test_numeric_retry_after_is_honoured_up_to_30_seconds():
+    client = TavilyClient("key")
+    assert client._backoff(0, "2") == 2.0
+    assert client._backoff(0, "3600") == 30.0
+    assert 0 <= client._backoff(10, "Wed, 21 Oct 2026 07:28:00 GMT") <= 30.0
+
+
+def test_rate_limited_searches_are_retried(sleeps):
+    client = client_with([(429, {"Retry-After": "120"}), (200, {})], retries=2)
+    assert client.search("python jobs") == {"results": ["python jobs"]}
+    assert sleeps == [30.0]
+
+
+def test_errors_after_the_last_retry_are_raised(sleeps):
+    client = client_with([(503, {}), (503, {})], retries=1)
+    with pytest.raises(TavilyError) as error:
+        client.search("python jobs")
+    assert error.value.status_code == 503
+    assert client.session.posts == 2
+
+
+def test_client_errors_are_not_retried(sleeps):
+    client = client_with([(401, {})], retries=3)
+    with pytest.raises(TavilyError):
+        client.search("python jobs")
+    assert sleeps == []
+
+
+def test_identical_searches_are_served_from_the_cache(sleeps):
+    client = client_with([(200, {}), (200, {})])
+    first = client.search("python jobs")
+    assert client.search("python jobs") is first
+    assert client.session.posts == 1
+    client.search("python jobs", use_cache=False)
+    assert client.session.posts == 2
+
+
+def test_cache_keeps_the_most_recent_searches(sleeps):
+    client = client_with([(200, {})] * 3, cache_max_entries=2)
+    for query in ("a", "b", "c"):
+        client.search(query)
+    assert [json.loads(key)[0] for key in client._cache] == ["b", "c"]